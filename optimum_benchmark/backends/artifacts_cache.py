@@ -0,0 +1,92 @@
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from contextlib import contextmanager
+from logging import getLogger
+from pathlib import Path
+import hashlib
+import shutil
+import json
+import os
+
+
+LOGGER = getLogger("artifacts_cache")
+
+# the key of each entry is saved along with its artifacts, for inspection
+KEY_FILE = "artifacts_key.json"
+
+
+class ArtifactsCache:
+    """
+    A content-addressed cache of backend artifacts (exported, optimized and
+    quantized models), where each entry is a directory named after the hash of
+    everything that determines its content. Entries are evicted in least
+    recently used order when the cache exceeds its disk budget.
+    """
+
+    def __init__(self, cache_dir: str, max_size_gb: Optional[float] = None):
+        self.cache_dir = Path(os.path.expanduser(cache_dir))
+        self.max_size = max_size_gb * 1e9 if max_size_gb is not None else None
+
+    def get(self, key: Dict[str, Any]) -> Optional[Path]:
+        entry = self.cache_dir / hash_key(key)
+        if not entry.exists():
+            return None
+
+        # the entry's modification time is its last access time, used for eviction
+        os.utime(entry)
+
+        return entry
+
+    @contextmanager
+    def put(self, key: Dict[str, Any]) -> Iterator[Path]:
+        """
+        Yields a staging directory in which the artifacts are saved, that only
+        becomes an entry of the cache once they're completely written.
+        """
+
+        entry = self.cache_dir / hash_key(key)
+        staging = self.cache_dir / f".{entry.name}.{os.getpid()}.tmp"
+        staging.mkdir(parents=True, exist_ok=True)
+
+        try:
+            yield staging
+            with open(staging / KEY_FILE, "w") as file_obj:
+                json.dump(key, file_obj, indent=4, default=str)
+            # another job might have stored the same artifacts in the meantime
+            os.rename(staging, entry)
+        except OSError:
+            if not entry.exists():
+                raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        self.evict(keep=entry)
+
+    def evict(self, keep: Path) -> None:
+        if self.max_size is None:
+            return
+
+        entries: List[Tuple[float, int, Path]] = []
+        for entry in self.cache_dir.iterdir():
+            if entry.name.startswith("."):
+                continue
+            entries.append((entry.stat().st_mtime, get_size(entry), entry))
+
+        total_size = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda entry: entry[0]):
+            if total_size <= self.max_size:
+                break
+            if entry == keep:
+                continue
+
+            LOGGER.info(f"\t+ Evicting {entry.name} ({size / 1e9:.2f} GB)")
+            shutil.rmtree(entry, ignore_errors=True)
+            total_size -= size
+
+
+def hash_key(key: Dict[str, Any]) -> str:
+    serialized_key = json.dumps(key, sort_keys=True, default=str)
+    return hashlib.sha256(serialized_key.encode()).hexdigest()[:32]
+
+
+def get_size(path: Path) -> int:
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
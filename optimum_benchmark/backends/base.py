@@ -1,8 +1,9 @@
-from typing import Any, Callable, Dict, List, Optional, Union
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 from dataclasses import dataclass, MISSING
 from multiprocessing import Process
 from abc import abstractmethod, ABC
 from logging import getLogger
+import platform
 import shutil
 import os
 import gc
@@ -12,8 +13,10 @@ import torch
 from torch import Tensor
 from datasets import Dataset
 from psutil import cpu_count
-from omegaconf import DictConfig
+from omegaconf import DictConfig, OmegaConf
 from optimum.exporters import TasksManager
+from optimum.version import __version__ as optimum_version
+from transformers import __version__ as transformers_version
 from transformers import (
     AutoConfig,
     AutoProcessor,
@@ -27,6 +30,7 @@ from transformers import (
 )
 
 
+from optimum_benchmark.backends.artifacts_cache import ArtifactsCache
 from optimum_benchmark.utils import (
     DIFFUSION_TASKS,
     TEXT_GENERATION_TASKS,
@@ -62,6 +66,19 @@ class BackendConfig(ABC):
     # clean up options
     delete_cache: bool = False
 
+    # artifacts cache options, to reuse the exported, optimized and quantized
+    # models of identical configurations across runs (least recently used
+    # entries are evicted beyond artifacts_cache_max_size_gb)
+    artifacts_cache: bool = False
+    artifacts_cache_dir: str = "${oc.env:OPTIMUM_BENCHMARK_ARTIFACTS_CACHE,~/.cache/optimum_benchmark/artifacts}"
+    artifacts_cache_max_size_gb: Optional[float] = 50
+
+    # compile cache options, to reuse the just-in-time work of backends across
+    # runs on this host: inductor's fx graph and code caches, openvino's
+    # compiled blobs (CACHE_DIR) and onnxruntime's optimized graphs
+    compile_cache: bool = False
+    compile_cache_dir: str = "${oc.env:OPTIMUM_BENCHMARK_COMPILE_CACHE,~/.cache/optimum_benchmark/compile}"
+
 
 class Backend(ABC):
     # model and pipeline benchmarks
@@ -70,12 +87,27 @@ class Backend(ABC):
     pretrained_config: Optional[PretrainedConfig]
     pretrained_processor: Optional[PreTrainedProcessor]
 
+    # backend config fields that change the cached artifacts
+    artifacts_config_keys: List[str] = []
+
     def __init__(self, model: str, task: str, device: str, hub_kwargs: DictConfig):
         self.model = model
         self.task = task
         self.device = torch.device(device)
         self.hub_kwargs = hub_kwargs
 
+        # backend metrics (e.g. cache hits) reported with the benchmark results
+        self.metrics: Dict[str, Any] = {}
+        self.artifacts_cache: Optional[ArtifactsCache] = None
+        self.compile_cache_dir: Optional[str] = None
+        # resolved lazily, only needed by the caches
+        self.model_sha: Optional[str] = None
+        # measured around configure, as part of the startup latency
+        self.configure_latency: float = 0.0
+        # spent in prepare_for_inference on measurements that aren't part
+        # of the startup latency (e.g. comparing specialized sessions)
+        self.excluded_startup_latency: float = 0.0
+
         if self.is_diffusion_pipeline():
             # for pipelines
             self.pretrained_config = None
@@ -182,12 +214,135 @@ class Backend(ABC):
             LOGGER.info("\t+ Checking contineous device isolation")
             self.check_continuous_isolation()
 
+    def get_artifacts_key(self, config: BackendConfig) -> Dict[str, Any]:
+        config_dict = OmegaConf.to_container(config, resolve=True)
+
+        artifacts_key = {
+            "model": self.model,
+            "revision": self.get_model_sha(),
+            "task": self.task,
+            "device": self.device.type,
+            "backend": config.name,
+            "backend_version": config.version,
+            "optimum_version": optimum_version,
+            "transformers_version": transformers_version,
+            "torch_version": torch.__version__,
+            **{key: config_dict[key] for key in self.artifacts_config_keys},
+        }
+        if config_dict.get("no_weights", False):
+            # random weights depend on the benchmark's seed, set before the backend
+            artifacts_key["seed"] = torch.initial_seed()
+
+        return artifacts_key
+
+    def get_model_sha(self) -> Optional[str]:
+        """
+        Returns the commit sha of the model's revision, so that cache keys change
+        when a branch (e.g. main) is updated, or the revision as is for local
+        models and when it can't be resolved.
+        """
+
+        revision = self.hub_kwargs.get("revision", None)
+        if os.path.isdir(self.model):
+            return revision
+        if self.model_sha is not None:
+            return self.model_sha
+
+        from huggingface_hub import model_info, snapshot_download
+
+        token = self.hub_kwargs.get("use_auth_token", None)
+        if not self.hub_kwargs.get("local_files_only", False):
+            try:
+                self.model_sha = model_info(
+                    self.model, revision=revision, token=token
+                ).sha
+            # the hub can be unreachable in many ways (offline mode, timeouts, ...)
+            except Exception as error:
+                LOGGER.warning(f"Could not resolve the model's revision: {error}")
+
+        if self.model_sha is None:
+            try:
+                # snapshots of the local hub cache are named after their commit sha
+                self.model_sha = os.path.basename(
+                    snapshot_download(
+                        repo_id=self.model,
+                        revision=revision,
+                        cache_dir=self.hub_kwargs.get("cache_dir", None),
+                        local_files_only=True,
+                        token=token,
+                        allow_patterns=[],
+                    )
+                )
+            except Exception:
+                LOGGER.warning(f"Using the unresolved revision {revision} in cache keys")
+                return revision
+
+        return self.model_sha
+
+    def load_artifacts_from_cache(self, config: BackendConfig) -> Optional[str]:
+        """
+        Returns the directory of the cached artifacts for this configuration,
+        or None if they're not cached (or caching is disabled).
+        """
+
+        if not config.artifacts_cache:
+            return None
+
+        self.artifacts_cache = ArtifactsCache(
+            cache_dir=config.artifacts_cache_dir,
+            max_size_gb=config.artifacts_cache_max_size_gb,
+        )
+        artifacts_dir = self.artifacts_cache.get(self.get_artifacts_key(config))
+        self.metrics["artifacts_cache_hit"] = artifacts_dir is not None
+
+        if artifacts_dir is not None:
+            LOGGER.info(f"\t+ Artifacts cache hit: {artifacts_dir}")
+            return str(artifacts_dir)
+
+        LOGGER.info("\t+ Artifacts cache miss")
+        return None
+
+    def save_artifacts_to_cache(self, config: BackendConfig, **kwargs) -> None:
+        if self.artifacts_cache is None:
+            return
+
+        LOGGER.info("\t+ Saving artifacts to cache")
+        with self.artifacts_cache.put(self.get_artifacts_key(config)) as artifacts_dir:
+            self.pretrained_model.save_pretrained(artifacts_dir, **kwargs)
+
+    def get_compile_cache_dir(self, config: BackendConfig) -> Optional[str]:
+        if not config.compile_cache:
+            return None
+
+        self.compile_cache_dir = os.path.join(
+            os.path.expanduser(config.compile_cache_dir),
+            platform.node(),
+            config.name,
+        )
+        os.makedirs(self.compile_cache_dir, exist_ok=True)
+        LOGGER.info(f"\t+ Using compile cache {self.compile_cache_dir}")
+
+        # the cache was cold if files are added to it during startup
+        self.compile_cache_files = list_files(self.compile_cache_dir)
+
+        return self.compile_cache_dir
+
+    def is_compile_cache_warm(self) -> Optional[bool]:
+        if self.compile_cache_dir is None:
+            return None
+
+        return list_files(self.compile_cache_dir) <= self.compile_cache_files
+
     # compiling in openvino requires input shapes
     def prepare_for_inference(self, input_shapes: Dict[str, int]) -> None:
         pass
 
     # symbolic tracing in transformers requires input names
-    def prepare_for_profiling(self, input_names: List[str]) -> None:
+    def prepare_for_profiling(
+        self,
+        input_names: List[str],
+        input_shapes: Dict[str, int],
+    ) -> None:
         pass
 
     # depending on the backend, we might need to prepare the model for training
@@ -206,6 +361,16 @@ class Backend(ABC):
     def generate(self, input: Dict[str, Tensor], **kwargs):
         raise NotImplementedError("Backend must implement generate method")
 
+    # keeps `requests` forward passes in flight (0 for the backend's optimal
+    # number) for `duration` seconds, returning their latencies and the
+    # total elapsed time
+    def forward_async(
+        self, input: Dict[str, Tensor], requests: int, duration: float
+    ) -> Tuple[List[float], float]:
+        raise NotImplementedError(
+            f"Asynchronous inference is not supported by {self.config.name} backend"
+        )
+
     def train(self):
         raise NotImplementedError("Backend must implement train method")
 
@@ -317,3 +482,11 @@ def extract_shapes_from_model_artifacts(
     shapes["num_queries"] = artifacts_dict.get("num_queries", 2)
 
     return shapes
+
+
+def list_files(directory: str) -> Set[str]:
+    return {
+        os.path.join(root, file)
+        for root, _, files in os.walk(directory)
+        for file in files
+    }
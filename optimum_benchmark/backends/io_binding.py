@@ -0,0 +1,109 @@
+from typing import Dict, List, Optional, Tuple
+from logging import getLogger
+
+import torch
+from torch import Tensor
+from onnxruntime import InferenceSession
+
+
+LOGGER = getLogger("io_binding")
+
+ORT_TO_TORCH_DTYPE = {
+    "tensor(bool)": torch.bool,
+    "tensor(int8)": torch.int8,
+    "tensor(uint8)": torch.uint8,
+    "tensor(int32)": torch.int32,
+    "tensor(int64)": torch.int64,
+    "tensor(float16)": torch.float16,
+    "tensor(float)": torch.float32,
+    "tensor(double)": torch.float64,
+}
+
+
+class CPUIOBinding:
+    """
+    Runs a cpu inference session with its inputs bound to the torch tensors'
+    memory (no copy nor numpy conversion) and its outputs written in torch
+    tensors that are preallocated and reused across runs. Inputs and outputs
+    are only bound again when the inputs change (shapes, dtypes or tensors).
+
+    The returned outputs are the reused buffers, they're overwritten by the
+    next run.
+    """
+
+    def __init__(self, session: InferenceSession):
+        self.session = session
+        self.io_binding = session.io_binding()
+        self.input_dtypes = {
+            input.name: ORT_TO_TORCH_DTYPE[input.type] for input in session.get_inputs()
+        }
+        self.output_names = [output.name for output in session.get_outputs()]
+
+        # tensors bound to the session, kept alive as long as they're bound
+        self.bound_inputs: Dict[str, Tensor] = {}
+        self.output_buffers: Dict[str, Tensor] = {}
+        self.inputs_key: Optional[Tuple] = None
+        self.binds: int = 0
+
+    def __call__(self, inputs: Dict[str, Tensor]) -> List[Tensor]:
+        # inputs unused by the session (e.g. token_type_ids) are ignored
+        inputs = {
+            name: tensor for name, tensor in inputs.items() if name in self.input_dtypes
+        }
+        inputs_key = tuple(
+            (name, tuple(tensor.shape), tensor.dtype, tensor.data_ptr())
+            for name, tensor in inputs.items()
+        )
+
+        if inputs_key != self.inputs_key:
+            self.bind(inputs)
+            self.inputs_key = inputs_key
+
+        self.session.run_with_iobinding(self.io_binding)
+
+        return [self.output_buffers[name] for name in self.output_names]
+
+    def bind(self, inputs: Dict[str, Tensor]) -> None:
+        LOGGER.debug(f"Binding inputs {[tuple(t.shape) for t in inputs.values()]}")
+        self.binds += 1
+        self.io_binding.clear_binding_inputs()
+        self.io_binding.clear_binding_outputs()
+
+        self.bound_inputs = {}
+        for name, tensor in inputs.items():
+            # a cast or a copy is only made when the tensor can't be bound as is
+            tensor = tensor.to(self.input_dtypes[name]).contiguous()
+            self.bound_inputs[name] = tensor
+            self.io_binding.bind_input(
+                name=name,
+                device_type="cpu",
+                device_id=0,
+                element_type=torch_to_numpy_dtype(tensor.dtype),
+                shape=tuple(tensor.shape),
+                buffer_ptr=tensor.data_ptr(),
+            )
+
+        # output shapes are symbolic, we get them from a run with outputs
+        # allocated by onnxruntime before allocating our own buffers
+        for name in self.output_names:
+            self.io_binding.bind_output(name, device_type="cpu")
+        self.session.run_with_iobinding(self.io_binding)
+        ort_outputs = self.io_binding.get_outputs()
+        self.io_binding.clear_binding_outputs()
+
+        self.output_buffers = {}
+        for name, ort_output in zip(self.output_names, ort_outputs):
+            buffer = torch.from_numpy(ort_output.numpy()).clone()
+            self.output_buffers[name] = buffer
+            self.io_binding.bind_output(
+                name=name,
+                device_type="cpu",
+                device_id=0,
+                element_type=torch_to_numpy_dtype(buffer.dtype),
+                shape=tuple(buffer.shape),
+                buffer_ptr=buffer.data_ptr(),
+            )
+
+
+def torch_to_numpy_dtype(dtype: torch.dtype):
+    return torch.empty(0, dtype=dtype).numpy().dtype
@@ -12,6 +12,7 @@ except ImportError:
     neural_compressor_version = "Not installed"
 
 from optimum_benchmark.backends.base import Backend, BackendConfig
+from optimum_benchmark.tracing import TRACER
 
 
 OmegaConf.register_new_resolver(
@@ -84,6 +85,14 @@ class INCConfig(BackendConfig):
 
 
 class INCBackend(Backend):
+    artifacts_config_keys = [
+        "no_weights",
+        "quantization",
+        "quantization_config",
+        "calibration",
+        "calibration_config",
+    ]
+
     def __init__(
         self, model: str, task: str, device: str, hub_kwargs: DictConfig
     ) -> None:
@@ -103,17 +112,24 @@ class INCBackend(Backend):
     def configure(self, config: INCConfig) -> None:
         super().configure(config)
 
-        with TemporaryDirectory() as tmpdirname:
-            if config.no_weights:
-                raise NotImplementedError(
-                    "no_weights is not supported for neural_compressor backend"
-                )
-            else:
-                self.load_model_from_pretrained(config)
-
-            if config.quantization:
-                self.quantize_model(config, tmpdirname)
-
+        # without quantization, the model is loaded as is from the hub
+        artifacts_dir = (
+            self.load_artifacts_from_cache(config) if config.quantization else None
+        )
+        if artifacts_dir is not None:
+            self.load_model_from_artifacts(config, artifacts_dir)
+        else:
+            with TemporaryDirectory() as tmpdirname:
+                if config.no_weights:
+                    self.load_model_from_config(config, tmpdirname)
+                else:
+                    self.load_model_from_pretrained(config)
+
+                if config.quantization:
+                    self.quantize_model(config, tmpdirname)
+                    self.save_artifacts_to_cache(config)
+
+    @TRACER.span("backend.load_model")
     def load_model_from_pretrained(self, config: INCConfig) -> None:
         self.pretrained_model = self.incmodel_class.from_pretrained(
             # something is wrong here, modeling is not consistent
@@ -124,6 +140,38 @@ class INCBackend(Backend):
             **self.hub_kwargs,
         )
 
+    @TRACER.span("backend.load_model")
+    def load_model_from_config(self, config: INCConfig, tmpdirname: str) -> None:
+        from optimum_benchmark.backends.utils import save_dummy_model
+
+        LOGGER.info("\t+ Saving model with random weights")
+        save_dummy_model(
+            automodel_class=self.automodel_class,
+            pretrained_config=self.pretrained_config,
+            output_dir=f"{tmpdirname}/random_model",
+            model_name_or_path=self.model,
+            **self.hub_kwargs,
+        )
+
+        LOGGER.info("\t+ Loading model with random weights")
+        self.pretrained_model = self.incmodel_class.from_pretrained(
+            model_name_or_path=f"{tmpdirname}/random_model",
+            **(
+                {"model_id": f"{tmpdirname}/random_model"}
+                if self.task == "text-generation"
+                else {}
+            ),
+            device_map=self.device,
+        )
+
+    @TRACER.span("backend.load_model")
+    def load_model_from_artifacts(self, config: INCConfig, artifacts_dir: str) -> None:
+        LOGGER.info("\t+ Loading cached quantized model")
+        self.pretrained_model = self.incmodel_class.from_pretrained(
+            model_name_or_path=artifacts_dir,
+        )
+
+    @TRACER.span("backend.quantize")
     def quantize_model(self, config: INCConfig, tmpdirname: str) -> None:
         from optimum.intel.neural_compressor.quantization import INCQuantizer
         from neural_compressor.config import (
@@ -143,9 +191,13 @@ class INCBackend(Backend):
         )
         quantization_config = PostTrainingQuantConfig(**quantization_config)
 
-        model = self.automodel_class.from_pretrained(self.model, **self.hub_kwargs)
+        if config.no_weights:
+            model = self.automodel_class.from_pretrained(f"{tmpdirname}/random_model")
+        else:
+            model = self.automodel_class.from_pretrained(self.model, **self.hub_kwargs)
         quantizer = INCQuantizer.from_pretrained(model, task=self.task)
 
+        calibration_dataset = None
         if config.calibration:
             preprocess_class = get_class(config.calibration_config.preprocess_class)
             preprocess_function = preprocess_class(model_name_or_path=self.model)
@@ -1,5 +1,11 @@
 import os
+import time
 import torch
+import shutil
+import statistics
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
 from torch import Tensor
 from datasets import Dataset
 from logging import getLogger
@@ -8,7 +14,7 @@ from dataclasses import dataclass, field
 from hydra.utils import get_class
 from tempfile import TemporaryDirectory
 from omegaconf.dictconfig import DictConfig
-from typing import Any, Callable, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, TYPE_CHECKING
 
 
 try:
@@ -16,6 +22,9 @@ try:
 except ImportError:
     onnxruntime_version = "Not installed"
 
+from datasets import __version__ as datasets_version
+from transformers import __version__ as transformers_version
+
 from optimum.onnxruntime import ORTOptimizer, ORTQuantizer
 from optimum.onnxruntime.configuration import (
     OptimizationConfig,
@@ -27,10 +36,25 @@ from optimum.onnxruntime.configuration import (
 
 
 from optimum_benchmark.backends.base import Backend, BackendConfig
-from optimum_benchmark.backends.utils import main_export, randomize_weights
-from optimum_benchmark.profilers.ort_profiler import ORTProfilingWrapper
+from optimum_benchmark.backends.artifacts_cache import ArtifactsCache
+from optimum_benchmark.tracing import TRACER
+from optimum_benchmark.trackers.load import LoadTracker, significant_figures
+from optimum_benchmark.trackers.memory import MemoryTracker
+from optimum_benchmark.backends.utils import (
+    main_export,
+    randomize_weights,
+    format_ort_quantization_dict,
+)
+from optimum_benchmark.profilers.ort_profiler import (
+    ORTProfilingWrapper,
+    get_inference_sessions,
+    set_inference_session,
+)
 from optimum_benchmark.utils import infer_device_id
 
+if TYPE_CHECKING:
+    import onnxruntime
+
 OmegaConf.register_new_resolver(
     "is_gpu",
     lambda device: torch.device(device).type == "cuda",
@@ -54,6 +78,10 @@ OmegaConf.register_new_resolver(
 
 LOGGER = getLogger("onnxruntime")
 
+# forward passes of the dynamic and specialized sessions, run back to back
+SPECIALIZATION_WARMUP_RUNS = 5
+SPECIALIZATION_RUNS = 20
+
 
 @dataclass
 class ORTConfig(BackendConfig):
@@ -72,10 +100,46 @@ class ORTConfig(BackendConfig):
     provider: str = "${infer_provider:${device}}"
     device_id: Optional[int] = "${infer_device_id:${device}}"
 
-    # inference options
+    # inference options, on cpu the io binding of single session models
+    # reuses preallocated output buffers across forward passes
     use_io_binding: bool = "${is_gpu:${device}}"
     enable_profiling: bool = "${is_profiling:${benchmark.name}}"
 
+    # session options
+    session_options: Dict = field(
+        default_factory=lambda: {
+            # ORT_DISABLE_ALL, ORT_ENABLE_BASIC, ORT_ENABLE_EXTENDED, ORT_ENABLE_ALL
+            "graph_optimization_level": "ORT_ENABLE_ALL",
+            # ORT_SEQUENTIAL, ORT_PARALLEL (inter op parallelism)
+            "execution_mode": "ORT_SEQUENTIAL",
+            "enable_cpu_mem_arena": True,
+            "enable_mem_pattern": True,
+            # threads busy wait for work, lower latency at the cost of cpu time
+            "intra_op_allow_spinning": True,
+            "inter_op_allow_spinning": True,
+            # flushes denormal floats to zero, faster on cpu but less precise
+            "denormal_as_zero": False,
+            # prepacked weights are copies, without prepacking the weights
+            # memory-mapped from external data stay shared with the page cache
+            "disable_prepacking": False,
+        }
+    )
+
+    # the weights are saved in a single external data file per onnx file,
+    # which onnxruntime memory-maps instead of copying them in its arena
+    external_data: bool = False
+
+    # ort format, the session's graph is converted to onnxruntime's flatbuffer
+    # format with its optimizations applied, and the session is created from
+    # it, with initializers used in place in the model's bytes instead of copied
+    ort_format: bool = False
+
+    # the free dimensions of the session's inputs named after the benchmark's
+    # input shapes (batch_size, sequence_length, ...) are fixed to their values,
+    # so that onnxruntime specializes its graph optimizations for these shapes
+    # (only batch_size with text generation models, whose sequences grow)
+    free_dimension_overrides: bool = False
+
     # optimization options
     optimization: bool = False
     optimization_config: Dict = field(
@@ -155,12 +219,37 @@ class ORTConfig(BackendConfig):
             "preprocess_class": "optimum_benchmark.preprocessors.glue.GluePreprocessor",
         }
     )
+    # the preprocessed calibration datasets are cached on disk with artifacts_cache
+    calibration_cache_dir: str = "${oc.env:OPTIMUM_BENCHMARK_CALIBRATION_DATASETS_CACHE,~/.cache/optimum_benchmark/calibration_datasets}"
+
+    # components (encoder, decoder, ...) are quantized in parallel processes,
+    # as many as there are components by default, 1 to quantize them serially
+    quantization_workers: Optional[int] = None
 
     # this will skip exporting the model and will use automodel instead
     use_ortmodel: bool = "${is_inference:${benchmark.name}}"
 
 
 class ORTBackend(Backend):
+    artifacts_config_keys = [
+        "export",
+        "no_weights",
+        "use_merged",
+        "use_cache",
+        "torch_dtype",
+        "external_data",
+        "optimization",
+        "optimization_config",
+        "auto_optimization",
+        "auto_optimization_config",
+        "quantization",
+        "quantization_config",
+        "auto_quantization",
+        "auto_quantization_config",
+        "calibration",
+        "calibration_config",
+    ]
+
     def __init__(
         self, model: str, task: str, device: str, hub_kwargs: DictConfig
     ) -> None:
@@ -189,23 +278,41 @@ class ORTBackend(Backend):
     def configure(self, config: ORTConfig) -> None:
         super().configure(config)
 
-        import onnxruntime
-
         # session options
-        self.session_options = onnxruntime.SessionOptions()
         if config.intra_op_num_threads is not None:
             LOGGER.info(
                 f"\t+ Setting onnxruntime session intra_op_num_threads({config.intra_op_num_threads})"
             )
-            self.session_options.intra_op_num_threads = config.intra_op_num_threads
         if config.inter_op_num_threads is not None:
             LOGGER.info(
                 f"\t+ Setting onnxruntime session inter_op_num_threads({config.inter_op_num_threads})"
             )
-            self.session_options.inter_op_num_threads = config.inter_op_num_threads
         if config.enable_profiling:
             LOGGER.info("\t+ Enabling onnxruntime profiling")
-            self.session_options.enable_profiling = True
+        LOGGER.info("\t+ Setting onnxruntime session options:")
+        for key, value in config.session_options.items():
+            LOGGER.info(f"\t\t+ {key}: {value}")
+        # overridden when the sessions load graphs already optimized by onnxruntime
+        self.graph_optimization_level = config.session_options.graph_optimization_level
+        self.session_options = self.create_session_options(config)
+
+        if config.free_dimension_overrides and config.ort_format:
+            raise ValueError("free_dimension_overrides can't be used with ort_format")
+        # the sessions are specialized in prepare_for_inference
+        self.dim_params = None
+        self.free_dimension_overrides = None
+
+        # optimum's io binding allocates new outputs on every call, for single
+        # session models on cpu we bind our own reusable output buffers
+        self.cpu_io_binding = (
+            config.use_io_binding
+            and self.device.type == "cpu"
+            and config.use_ortmodel
+            and not self.is_text_generation_model()
+            and not self.is_diffusion_pipeline()
+        )
+        self.ortmodel_io_binding = config.use_io_binding and not self.cpu_io_binding
+        self.io_binding = None
 
         # provider options
         self.provider_options = {}
@@ -227,16 +334,71 @@ class ORTBackend(Backend):
 
         with TemporaryDirectory() as tmpdirname:
             if config.use_ortmodel:
-                if config.no_weights:
-                    self.load_ortmodel_from_config(config, tmpdirname)
+                optimized_graphs_dir = self.load_optimized_graphs_from_cache(config)
+                artifacts_dir = (
+                    self.load_artifacts_from_cache(config)
+                    if optimized_graphs_dir is None
+                    else None
+                )
+                if optimized_graphs_dir is not None:
+                    # the graphs were already optimized by onnxruntime
+                    self.graph_optimization_level = "ORT_DISABLE_ALL"
+                    self.session_options = self.create_session_options(config)
+                    self.load_ortmodel_from_artifacts(config, optimized_graphs_dir)
+                elif artifacts_dir is not None:
+                    self.load_ortmodel_from_artifacts(config, artifacts_dir)
                 else:
-                    self.load_ortmodel_from_pretrained(config, tmpdirname)
+                    if config.no_weights:
+                        self.load_ortmodel_from_config(config, tmpdirname)
+                    else:
+                        self.load_ortmodel_from_pretrained(config, tmpdirname)
+                    if config.external_data:
+                        self.load_ortmodel_with_external_data(config, tmpdirname)
+                    self.save_artifacts_to_cache(config)
+
+                if optimized_graphs_dir is None:
+                    self.save_optimized_graphs_to_cache(config)
+
+                if config.ort_format:
+                    self.load_ort_format_session(config, tmpdirname)
+
+                if self.cpu_io_binding:
+                    from optimum_benchmark.backends.io_binding import CPUIOBinding
+
+                    LOGGER.info("\t+ Binding inputs and outputs on cpu")
+                    self.io_binding = CPUIOBinding(self.pretrained_model.model)
             else:
                 if config.no_weights:
                     self.load_automodel_from_config(config)
                 else:
                     self.load_automodel_from_pretrained(config)
 
+    def create_session_options(
+        self, config: ORTConfig
+    ) -> "onnxruntime.SessionOptions":
+        import onnxruntime
+
+        session_options = onnxruntime.SessionOptions()
+        if config.intra_op_num_threads is not None:
+            session_options.intra_op_num_threads = config.intra_op_num_threads
+        if config.inter_op_num_threads is not None:
+            session_options.inter_op_num_threads = config.inter_op_num_threads
+        if config.enable_profiling:
+            session_options.enable_profiling = True
+
+        set_session_options(session_options, config.session_options)
+        session_options.graph_optimization_level = getattr(
+            onnxruntime.GraphOptimizationLevel, self.graph_optimization_level
+        )
+        if config.ort_format:
+            # only applies to models in ort format
+            session_options.add_session_config_entry(
+                "session.use_ort_model_bytes_for_initializers", "1"
+            )
+
+        return session_options
+
+    @TRACER.span("backend.load_model")
     def load_ortmodel_from_config(self, config: ORTConfig, tmpdirname: str) -> None:
         LOGGER.info(
             f"\t+ Loading model from config in {config.torch_dtype} on {self.device}"
@@ -265,7 +427,7 @@ class ORTBackend(Backend):
         self.pretrained_model = self.ortmodel_class.from_pretrained(
             model_id=f"{tmpdirname}/exported_model",
             session_options=self.session_options,
-            use_io_binding=config.use_io_binding,
+            use_io_binding=self.ortmodel_io_binding,
             provider=config.provider,
             provider_options=self.provider_options,
             **(
@@ -288,6 +450,7 @@ class ORTBackend(Backend):
         if config.quantization or config.auto_quantization is not None:
             self.quantize(config, tmpdirname)
 
+    @TRACER.span("backend.load_model")
     def load_ortmodel_from_pretrained(self, config: ORTConfig, tmpdirname: str) -> None:
         if self.torch_dtype is not None and self.torch_dtype != torch.float32:
             raise NotImplementedError(
@@ -297,7 +460,7 @@ class ORTBackend(Backend):
         self.pretrained_model = self.ortmodel_class.from_pretrained(
             model_id=self.model,
             session_options=self.session_options,
-            use_io_binding=config.use_io_binding,
+            use_io_binding=self.ortmodel_io_binding,
             provider=config.provider,
             provider_options=self.provider_options,
             export=config.export,
@@ -318,6 +481,184 @@ class ORTBackend(Backend):
         if config.quantization or config.auto_quantization is not None:
             self.quantize(config, tmpdirname)
 
+    @TRACER.span("backend.load_model")
+    def load_ortmodel_from_artifacts(self, config: ORTConfig, artifacts_dir: str) -> None:
+        LOGGER.info(f"\t+ Loading model from {artifacts_dir} in onnxruntime")
+        # loading already exported models is only session creation
+        load_tracker = LoadTracker()
+        memory_tracker = MemoryTracker(self)
+        with memory_tracker.track(), load_tracker.track():
+            self.pretrained_model = self.ortmodel_class.from_pretrained(
+                model_id=artifacts_dir,
+                session_options=self.session_options,
+                use_io_binding=self.ortmodel_io_binding,
+                provider=config.provider,
+                provider_options=self.provider_options,
+                **(
+                    {
+                        "use_merged": config.use_merged,
+                        "use_cache": config.use_cache,
+                    }
+                    if self.is_text_generation_model()
+                    else {}
+                ),
+                export=False,
+            )
+
+        self.metrics["session_load_time(s)"] = significant_figures(
+            load_tracker.load_time
+        )
+        self.metrics["session_load_memory(MB)"] = significant_figures(
+            load_tracker.memory_increase / 1e6
+        )
+        self.metrics["session_load_peak_memory(MB)"] = memory_tracker.get_peak_memory()
+        LOGGER.info(
+            f"\t+ Loaded sessions in {self.metrics['session_load_time(s)']} (s), "
+            f"peak memory: {self.metrics['session_load_peak_memory(MB)']} (MB)"
+        )
+
+    @TRACER.span("backend.external_data")
+    def load_ortmodel_with_external_data(
+        self, config: ORTConfig, tmpdirname: str
+    ) -> None:
+        model_dir = Path(self.pretrained_model.model_save_dir)
+        external_data_dir = Path(tmpdirname) / "external_data"
+
+        LOGGER.info("\t+ Saving onnx models with consolidated external data")
+        # configs and preprocessors, the onnx files and their data are rewritten
+        shutil.copytree(
+            model_dir,
+            external_data_dir,
+            ignore=shutil.ignore_patterns("*.onnx", "*.onnx_data", "*.onnx.data"),
+        )
+        for onnx_file in model_dir.rglob("*.onnx"):
+            save_with_external_data(
+                onnx_file, external_data_dir / onnx_file.relative_to(model_dir)
+            )
+        self.delete_pretrained_model()
+
+        self.load_ortmodel_from_artifacts(config, str(external_data_dir))
+
+    def get_optimized_graphs_key(self, config: ORTConfig) -> Dict[str, Any]:
+        return {
+            **self.get_artifacts_key(config),
+            "provider": config.provider,
+            # the optimized graphs depend on the session's options
+            "session_options": OmegaConf.to_container(
+                config.session_options, resolve=True
+            ),
+        }
+
+    def load_optimized_graphs_from_cache(self, config: ORTConfig) -> Optional[str]:
+        compile_cache_dir = self.get_compile_cache_dir(config)
+        if compile_cache_dir is None:
+            return None
+
+        # onnxruntime doesn't reuse the graphs it optimizes at session creation,
+        # so we store them as artifacts, keyed by the session's settings as well
+        self.optimized_graphs_cache = ArtifactsCache(
+            cache_dir=compile_cache_dir,
+            max_size_gb=config.artifacts_cache_max_size_gb,
+        )
+        optimized_graphs_dir = self.optimized_graphs_cache.get(
+            self.get_optimized_graphs_key(config)
+        )
+
+        if optimized_graphs_dir is not None:
+            LOGGER.info(f"\t+ Optimized graphs cache hit: {optimized_graphs_dir}")
+            return str(optimized_graphs_dir)
+
+        return None
+
+    @TRACER.span("backend.save_optimized_graphs")
+    def save_optimized_graphs_to_cache(self, config: ORTConfig) -> None:
+        if self.compile_cache_dir is None:
+            return
+
+        import onnxruntime
+
+        LOGGER.info("\t+ Saving onnxruntime optimized graphs to compile cache")
+        model_dir = Path(self.pretrained_model.model_save_dir)
+        with self.optimized_graphs_cache.put(
+            self.get_optimized_graphs_key(config)
+        ) as optimized_graphs_dir:
+            # configs and external data first, the latter is rewritten below
+            for file in model_dir.iterdir():
+                if file.is_file() and file.suffix != ".onnx":
+                    shutil.copy(file, optimized_graphs_dir)
+
+            for file in model_dir.glob("*.onnx"):
+                session_options = onnxruntime.SessionOptions()
+                set_session_options(session_options, config.session_options)
+                session_options.optimized_model_filepath = str(
+                    optimized_graphs_dir / file.name
+                )
+                # models bigger than 2GB can't be saved without external data
+                session_options.add_session_config_entry(
+                    "session.optimized_model_external_initializers_file_name",
+                    f"{file.name}_data",
+                )
+                onnxruntime.InferenceSession(
+                    str(file),
+                    sess_options=session_options,
+                    providers=[config.provider],
+                    provider_options=[self.provider_options],
+                )
+
+    @TRACER.span("backend.load_ort_format_session")
+    def load_ort_format_session(self, config: ORTConfig, tmpdirname: str) -> None:
+        import onnxruntime
+
+        if not isinstance(
+            getattr(self.pretrained_model, "model", None), onnxruntime.InferenceSession
+        ):
+            raise NotImplementedError(
+                "ort_format is only supported by single session models"
+            )
+
+        onnx_file = Path(self.pretrained_model.model_path)
+        ort_file = Path(tmpdirname) / "ort_format" / onnx_file.with_suffix(".ort").name
+        ort_file.parent.mkdir(parents=True, exist_ok=True)
+
+        LOGGER.info(f"\t+ Converting {onnx_file.name} to ort format")
+        session_options = onnxruntime.SessionOptions()
+        set_session_options(session_options, config.session_options)
+        session_options.optimized_model_filepath = str(ort_file)
+        session_options.add_session_config_entry("session.save_model_format", "ORT")
+        onnxruntime.InferenceSession(
+            str(onnx_file),
+            sess_options=session_options,
+            providers=[config.provider],
+            provider_options=[self.provider_options],
+        )
+
+        # both sessions are created the same way, outside of optimum
+        for name, model_file in [("", onnx_file), ("ort_format_", ort_file)]:
+            load_tracker = LoadTracker()
+            with load_tracker.track():
+                session = onnxruntime.InferenceSession(
+                    str(model_file),
+                    sess_options=self.session_options,
+                    providers=[config.provider],
+                    provider_options=[self.provider_options],
+                )
+            self.metrics[f"{name}session_creation_time(s)"] = significant_figures(
+                load_tracker.load_time
+            )
+            self.metrics[f"{name}session_creation_memory(MB)"] = significant_figures(
+                load_tracker.memory_increase / 1e6
+            )
+
+        LOGGER.info(
+            f"\t+ Session created in {self.metrics['session_creation_time(s)']} (s) "
+            f"from onnx and in {self.metrics['ort_format_session_creation_time(s)']} (s) "
+            "from ort format"
+        )
+
+        # the last session, created from the ort format, replaces optimum's
+        self.pretrained_model.model = session
+
+    @TRACER.span("backend.optimize")
     def optimize(self, config: ORTConfig, tmpdirname: str) -> None:
         if config.auto_optimization is not None:
             LOGGER.info(f"\t+ Using auto optimization {config.auto_optimization}")
@@ -352,11 +693,12 @@ class ORTBackend(Backend):
         self.pretrained_model = self.ortmodel_class.from_pretrained(
             model_id=f"{tmpdirname}/optimized",
             session_options=self.session_options,
-            use_io_binding=config.use_io_binding,
+            use_io_binding=self.ortmodel_io_binding,
             provider=config.provider,
             provider_options=self.provider_options,
         )
 
+    @TRACER.span("backend.quantize")
     def quantize(self, config: ORTConfig, tmpdirname: str) -> None:
         if config.auto_quantization is not None:
             LOGGER.info(
@@ -373,47 +715,66 @@ class ORTBackend(Backend):
 
         else:
             LOGGER.info("\t+ Using manual quantization and its config")
-            from optimum_benchmark.backends.utils import format_ort_quantization_dict
-
             quantization_dict = OmegaConf.to_container(
                 config.quantization_config, resolve=True
             )
             quantization_dict = format_ort_quantization_dict(quantization_dict)
             quantization_config = QuantizationConfig(**quantization_dict)
 
+        calibration_dataset_dir = (
+            self.get_calibration_dataset(config, tmpdirname)
+            if config.calibration
+            else None
+        )
+
         LOGGER.info("\t+ Attempting quantization")
         model_dir = self.pretrained_model.model_save_dir
         components = [file for file in os.listdir(model_dir) if file.endswith(".onnx")]
-        for component in components:
-            LOGGER.info(f"\t+ Quantizing {component}")
-            quantizer = ORTQuantizer.from_pretrained(model_dir, file_name=component)
-
-            if config.calibration:
-                preprocess_class = get_class(config.calibration_config.preprocess_class)
-                preprocess_function = preprocess_class(model_name_or_path=self.model)
-
-                calibration_dataset = quantizer.get_calibration_dataset(
-                    dataset_name=config.calibration_config.dataset_name,
-                    num_samples=config.calibration_config.num_samples,
-                    dataset_config_name=config.calibration_config.dataset_config_name,
-                    dataset_split=config.calibration_config.dataset_split,
-                    preprocess_function=preprocess_function,
-                )
-
-                # Create the calibration configuration containing the parameters related to calibration.
-                calibration_config = AutoCalibrationConfig.minmax(calibration_dataset)
+        # each component is quantized in its own directory, they all save configs
+        components_dirs = {
+            component: f"{tmpdirname}/quantized_components/{component}"
+            for component in components
+        }
+        quantization_workers = min(
+            config.quantization_workers or len(components), len(components)
+        )
 
-                # Perform the calibration step: computes the activations quantization ranges
-                calibration_tensors_range = quantizer.fit(
-                    dataset=calibration_dataset,
-                    calibration_config=calibration_config,
-                    operators_to_quantize=quantization_config.operators_to_quantize,
+        if quantization_workers == 1:
+            for component in components:
+                LOGGER.info(f"\t+ Quantizing {component}")
+                quantize_component(
+                    model_dir=model_dir,
+                    component=component,
+                    save_dir=components_dirs[component],
+                    quantization_config=quantization_config,
+                    calibration_dataset_dir=calibration_dataset_dir,
                 )
-
-            quantizer.quantize(
-                save_dir=f"{tmpdirname}/quantized",
-                calibration_tensors_range=calibration_tensors_range,
-                quantization_config=quantization_config,
+        else:
+            LOGGER.info(
+                f"\t+ Quantizing {components} in {quantization_workers} processes"
+            )
+            # spawned, forking a process with initialized thread pools isn't safe
+            with ProcessPoolExecutor(
+                max_workers=quantization_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            ) as executor:
+                futures = [
+                    executor.submit(
+                        quantize_component,
+                        model_dir=model_dir,
+                        component=component,
+                        save_dir=components_dirs[component],
+                        quantization_config=quantization_config,
+                        calibration_dataset_dir=calibration_dataset_dir,
+                    )
+                    for component in components
+                ]
+                for future in as_completed(futures):
+                    LOGGER.info(f"\t+ Quantized {future.result()}")
+
+        for component_dir in components_dirs.values():
+            shutil.copytree(
+                component_dir, f"{tmpdirname}/quantized", dirs_exist_ok=True
             )
         self.delete_pretrained_model()
 
@@ -421,11 +782,73 @@ class ORTBackend(Backend):
         self.pretrained_model = self.ortmodel_class.from_pretrained(
             model_id=f"{tmpdirname}/quantized",
             session_options=self.session_options,
-            use_io_binding=config.use_io_binding,
+            use_io_binding=self.ortmodel_io_binding,
             provider=config.provider,
             provider_options=self.provider_options,
         )
 
+    @TRACER.span("backend.calibration_dataset")
+    def get_calibration_dataset(self, config: ORTConfig, tmpdirname: str) -> str:
+        """
+        Returns the directory of the preprocessed calibration dataset, which
+        is built once for all components, and cached on disk along with the
+        artifacts when backend.artifacts_cache is enabled.
+        """
+
+        calibration_dict = OmegaConf.to_container(
+            config.calibration_config, resolve=True
+        )
+        calibration_cache = None
+        if config.artifacts_cache:
+            calibration_cache = ArtifactsCache(
+                cache_dir=config.calibration_cache_dir,
+                max_size_gb=config.artifacts_cache_max_size_gb,
+            )
+            calibration_key = {
+                "model": self.model,
+                "revision": self.get_model_sha(),
+                "calibration_config": calibration_dict,
+                "datasets_version": datasets_version,
+                "transformers_version": transformers_version,
+            }
+
+            calibration_dataset_dir = calibration_cache.get(calibration_key)
+            if calibration_dataset_dir is not None:
+                LOGGER.info(
+                    f"\t+ Loading cached calibration dataset {calibration_dataset_dir}"
+                )
+                return str(calibration_dataset_dir)
+
+        from datasets import load_dataset
+
+        LOGGER.info("\t+ Preprocessing calibration dataset")
+        calibration_dataset = load_dataset(
+            calibration_dict["dataset_name"],
+            name=calibration_dict["dataset_config_name"],
+            split=calibration_dict["dataset_split"],
+        )
+        num_samples = min(calibration_dict["num_samples"], len(calibration_dataset))
+        # same sampling as ORTQuantizer.get_calibration_dataset
+        calibration_dataset = calibration_dataset.shuffle(seed=2016).select(
+            range(num_samples)
+        )
+        preprocess_class = get_class(calibration_dict["preprocess_class"])
+        preprocess_function = preprocess_class(model_name_or_path=self.model)
+        calibration_dataset = calibration_dataset.map(
+            preprocess_function, batched=calibration_dict["preprocess_batch"]
+        )
+
+        if calibration_cache is None:
+            calibration_dataset_dir = f"{tmpdirname}/calibration_dataset"
+            calibration_dataset.save_to_disk(f"{calibration_dataset_dir}/dataset")
+            return calibration_dataset_dir
+
+        with calibration_cache.put(calibration_key) as calibration_dataset_dir:
+            calibration_dataset.save_to_disk(str(calibration_dataset_dir / "dataset"))
+
+        return str(calibration_cache.get(calibration_key))
+
+    @TRACER.span("backend.load_model")
     def load_automodel_from_config(self, config: ORTConfig) -> None:
         from accelerate import init_empty_weights
 
@@ -438,6 +861,7 @@ class ORTBackend(Backend):
         self.pretrained_model.to_empty(device=self.device)
         randomize_weights(self.pretrained_model)
 
+    @TRACER.span("backend.load_model")
     def load_automodel_from_pretrained(self, config: ORTConfig) -> None:
         with self.device:
             self.pretrained_model = self.automodel_class.from_pretrained(
@@ -446,10 +870,177 @@ class ORTBackend(Backend):
                 **self.hub_kwargs,
             )
 
-    def prepare_for_profiling(self, input_names: List[str]) -> None:
+    @TRACER.span("backend.prepare_for_inference")
+    def prepare_for_inference(self, input_shapes: Dict[str, int]) -> None:
+        if self.config.free_dimension_overrides:
+            self.specialize_session(input_shapes)
+
+    def specialize_session(self, input_shapes: Dict[str, int]) -> None:
+        import onnxruntime
+
+        if self.dim_params is None:
+            if not isinstance(
+                getattr(self.pretrained_model, "model", None),
+                onnxruntime.InferenceSession,
+            ):
+                raise NotImplementedError(
+                    "free_dimension_overrides is only supported by single session models"
+                )
+            self.dim_params = {
+                dim
+                for input in self.pretrained_model.model.get_inputs()
+                for dim in input.shape
+                if isinstance(dim, str)
+            }
+
+        free_dimension_overrides = {
+            name: value
+            for name, value in input_shapes.items()
+            if name in self.dim_params
+            and (name == "batch_size" or not self.is_text_generation_model())
+        }
+        if free_dimension_overrides == self.free_dimension_overrides:
+            # e.g. prepare_for_inference called again with the same shapes
+            return
+
+        if self.free_dimension_overrides is None:
+            dynamic_session = self.pretrained_model.model
+        else:
+            # the dynamic session isn't kept around once specialized,
+            # we recreate it to compare it with the new specialization
+            dynamic_session = onnxruntime.InferenceSession(
+                str(self.pretrained_model.model_path),
+                sess_options=self.create_session_options(self.config),
+                providers=[self.config.provider],
+                provider_options=[self.provider_options],
+            )
+        self.free_dimension_overrides = free_dimension_overrides
+
+        LOGGER.info("\t+ Creating a session with free dimension overrides:")
+        session_options = self.create_session_options(self.config)
+        for name, value in free_dimension_overrides.items():
+            LOGGER.info(f"\t\t+ {name}: {value}")
+            session_options.add_free_dimension_override_by_name(name, value)
+
+        start = time.perf_counter()
+        specialized_session = onnxruntime.InferenceSession(
+            str(self.pretrained_model.model_path),
+            sess_options=session_options,
+            providers=[self.config.provider],
+            provider_options=[self.provider_options],
+        )
+        self.metrics["specialized_session_creation_time(s)"] = significant_figures(
+            time.perf_counter() - start
+        )
+
+        # the comparison isn't part of the startup latency
+        start = time.perf_counter()
+        self.compare_sessions(dynamic_session, specialized_session, input_shapes)
+        self.excluded_startup_latency += time.perf_counter() - start
+
+        self.pretrained_model.model = specialized_session
+        if self.io_binding is not None:
+            from optimum_benchmark.backends.io_binding import CPUIOBinding
+
+            self.io_binding = CPUIOBinding(specialized_session)
+
+    @TRACER.span("backend.compare_sessions")
+    def compare_sessions(
+        self,
+        dynamic_session: "onnxruntime.InferenceSession",
+        specialized_session: "onnxruntime.InferenceSession",
+        input_shapes: Dict[str, int],
+    ) -> None:
+        from optimum_benchmark.backends.io_binding import ORT_TO_TORCH_DTYPE
+        from optimum_benchmark.generators.input_generator import InputGenerator
+
+        input_generator = InputGenerator(
+            task=self.task,
+            input_shapes=input_shapes,
+            pretrained_config=self.pretrained_config,
+        )
+        generated_inputs = input_generator.generate(mode="forward")
+
+        session_inputs = {}
+        for input in dynamic_session.get_inputs():
+            if input.name not in generated_inputs:
+                # e.g. past key values
+                LOGGER.info(
+                    f"\t+ Input {input.name} can't be generated, "
+                    "skipping the comparison of the sessions"
+                )
+                return
+            session_inputs[input.name] = (
+                generated_inputs[input.name].to(ORT_TO_TORCH_DTYPE[input.type]).numpy()
+            )
+
+        # alternating runs, so that both sessions are measured in the same conditions
+        sessions = {"dynamic": dynamic_session, "specialized": specialized_session}
+        latencies = {name: [] for name in sessions}
+        for run in range(SPECIALIZATION_WARMUP_RUNS + SPECIALIZATION_RUNS):
+            for name, session in sessions.items():
+                start = time.perf_counter()
+                session.run(None, session_inputs)
+                if run >= SPECIALIZATION_WARMUP_RUNS:
+                    latencies[name].append(time.perf_counter() - start)
+
+        for name in sessions:
+            self.metrics[f"{name}_session_latency(s)"] = significant_figures(
+                statistics.median(latencies[name])
+            )
+        self.metrics["specialized_session_speedup(%)"] = significant_figures(
+            (
+                self.metrics["dynamic_session_latency(s)"]
+                / self.metrics["specialized_session_latency(s)"]
+                - 1
+            )
+            * 100
+        )
+        LOGGER.info(
+            f"\t+ Session latency: {self.metrics['dynamic_session_latency(s)']:.2e} (s) "
+            f"dynamic, {self.metrics['specialized_session_latency(s)']:.2e} (s) specialized"
+        )
+
+    @TRACER.span("backend.separate_profiling_files")
+    def separate_profiling_files(self) -> None:
+        import onnxruntime
+
+        # the sessions of a model are created by optimum with the same session
+        # options, and onnxruntime names profiling files after their prefix and
+        # the session's creation time (to the second), so they would overwrite
+        # each other: we recreate each session with its own prefix
+        LOGGER.info("\t+ Recreating sessions with their own profiling files")
+        for name, session in get_inference_sessions(self.pretrained_model).items():
+            session_options = self.create_session_options(self.config)
+            session_options.profile_file_prefix = f"onnxruntime_profile_{name}"
+            profiled_session = onnxruntime.InferenceSession(
+                session._model_path,
+                sess_options=session_options,
+                providers=session.get_providers(),
+                provider_options=[
+                    session.get_provider_options()[provider]
+                    for provider in session.get_providers()
+                ],
+            )
+            set_inference_session(self.pretrained_model, name, profiled_session)
+
+            # the original sessions' traces are empty and would be left behind
+            trace_file = session.end_profiling()
+            if os.path.exists(trace_file):
+                os.remove(trace_file)
+
+    def prepare_for_profiling(
+        self,
+        input_names: List[str],
+        input_shapes: Dict[str, int],
+    ) -> None:
         LOGGER.info("Preparing model for profiling")
+        if len(get_inference_sessions(self.pretrained_model)) > 1:
+            self.separate_profiling_files()
         LOGGER.info("\t+ Wrapping model inside profiler")
         self.pretrained_model = ORTProfilingWrapper(self.pretrained_model)
+        # forward passes have to go through the profiler
+        self.io_binding = None
 
     def prepare_for_training(
         self,
@@ -472,6 +1063,9 @@ class ORTBackend(Backend):
         )
 
     def forward(self, input: Dict[str, Tensor], **kwargs) -> Tensor:
+        if self.io_binding is not None:
+            return self.io_binding(input)[0]
+
         output = self.pretrained_model(**input, **kwargs)[0]
 
         return output
@@ -485,3 +1079,90 @@ class ORTBackend(Backend):
         results = self.trainer.train()
 
         return results
+
+
+def quantize_component(
+    model_dir: str,
+    component: str,
+    save_dir: str,
+    quantization_config: QuantizationConfig,
+    calibration_dataset_dir: Optional[str] = None,
+) -> str:
+    # a module level function, to be run in the quantization processes
+    quantizer = ORTQuantizer.from_pretrained(model_dir, file_name=component)
+
+    calibration_tensors_range = None
+    if calibration_dataset_dir is not None:
+        from datasets import load_from_disk
+
+        # dropping the columns that aren't inputs of this component
+        calibration_dataset = quantizer.clean_calibration_dataset(
+            load_from_disk(f"{calibration_dataset_dir}/dataset")
+        )
+
+        # Create the calibration configuration containing the parameters related to calibration.
+        calibration_config = AutoCalibrationConfig.minmax(calibration_dataset)
+
+        # Perform the calibration step: computes the activations quantization ranges
+        calibration_tensors_range = quantizer.fit(
+            dataset=calibration_dataset,
+            calibration_config=calibration_config,
+            operators_to_quantize=quantization_config.operators_to_quantize,
+        )
+
+    quantizer.quantize(
+        save_dir=save_dir,
+        calibration_tensors_range=calibration_tensors_range,
+        quantization_config=quantization_config,
+    )
+
+    return component
+
+
+def save_with_external_data(onnx_file: Path, output_file: Path) -> None:
+    # all the tensors bigger than 1KB go in a single file, named like optimum's
+    import onnx
+
+    model = onnx.load(str(onnx_file), load_external_data=True)
+    onnx.save_model(
+        model,
+        str(output_file),
+        save_as_external_data=True,
+        all_tensors_to_one_file=True,
+        location=f"{output_file.name}_data",
+        size_threshold=1024,
+        convert_attribute=False,
+    )
+
+
+def set_session_options(
+    session_options: "onnxruntime.SessionOptions", options: Dict[str, Any]
+) -> None:
+    import onnxruntime
+
+    session_options.graph_optimization_level = getattr(
+        onnxruntime.GraphOptimizationLevel, options["graph_optimization_level"]
+    )
+    session_options.execution_mode = getattr(
+        onnxruntime.ExecutionMode, options["execution_mode"]
+    )
+    session_options.enable_cpu_mem_arena = options["enable_cpu_mem_arena"]
+    session_options.enable_mem_pattern = options["enable_mem_pattern"]
+
+    # options that are only available as session config entries
+    session_options.add_session_config_entry(
+        "session.intra_op.allow_spinning",
+        "1" if options["intra_op_allow_spinning"] else "0",
+    )
+    session_options.add_session_config_entry(
+        "session.inter_op.allow_spinning",
+        "1" if options["inter_op_allow_spinning"] else "0",
+    )
+    session_options.add_session_config_entry(
+        "session.set_denormal_as_zero",
+        "1" if options["denormal_as_zero"] else "0",
+    )
+    session_options.add_session_config_entry(
+        "session.disable_prepacking",
+        "1" if options["disable_prepacking"] else "0",
+    )
@@ -1,3 +1,4 @@
+import time
 import torch
 import inspect
 from torch import Tensor
@@ -5,7 +6,7 @@ from logging import getLogger
 from omegaconf import DictConfig
 from dataclasses import dataclass, field
 from hydra.utils import get_class
-from typing import Dict, Optional
+from typing import Dict, List, Optional, Tuple
 from tempfile import TemporaryDirectory
 
 try:
@@ -14,6 +15,7 @@ except ImportError:
     openvino_version = "Not installed"
 
 from optimum_benchmark.backends.base import Backend, BackendConfig
+from optimum_benchmark.tracing import TRACER
 
 LOGGER = getLogger("openvino")
 
@@ -35,6 +37,12 @@ class OVConfig(BackendConfig):
     reshape: bool = False
     half: bool = False
 
+    # performance options, LATENCY, THROUGHPUT or CUMULATIVE_THROUGHPUT
+    # (openvino's default is LATENCY), streams can be a number or AUTO
+    performance_hint: Optional[str] = None
+    num_streams: Optional[str] = None
+    inference_num_threads: Optional[int] = None
+
     # quantization options
     quantization: bool = False
     quantization_config: Dict = field(
@@ -59,6 +67,16 @@ class OVConfig(BackendConfig):
 
 
 class OVBackend(Backend):
+    artifacts_config_keys = [
+        "export",
+        "no_weights",
+        "use_merged",
+        "torch_dtype",
+        "quantization",
+        "quantization_config",
+        "calibration_config",
+    ]
+
     def __init__(
         self, model: str, task: str, device: str, hub_kwargs: DictConfig
     ) -> None:
@@ -78,6 +96,24 @@ class OVBackend(Backend):
     def configure(self, config: OVConfig) -> None:
         super().configure(config)
 
+        # openvino options, passed to the models at loading
+        self.ov_config = {}
+        compile_cache_dir = self.get_compile_cache_dir(config)
+        if compile_cache_dir is not None:
+            # compiled blobs are reused when compiling the same model and device
+            self.ov_config["CACHE_DIR"] = compile_cache_dir
+        if config.performance_hint is not None:
+            LOGGER.info(f"\t+ Setting openvino PERFORMANCE_HINT({config.performance_hint})")
+            self.ov_config["PERFORMANCE_HINT"] = config.performance_hint
+        if config.num_streams is not None:
+            LOGGER.info(f"\t+ Setting openvino NUM_STREAMS({config.num_streams})")
+            self.ov_config["NUM_STREAMS"] = str(config.num_streams)
+        if config.inference_num_threads is not None:
+            LOGGER.info(
+                f"\t+ Setting openvino INFERENCE_NUM_THREADS({config.inference_num_threads})"
+            )
+            self.ov_config["INFERENCE_NUM_THREADS"] = str(config.inference_num_threads)
+
         # Set torch dtype
         self.torch_dtype = (
             getattr(torch, config.torch_dtype)  # in case of torch.dtype
@@ -88,16 +124,20 @@ class OVBackend(Backend):
             f"\t+ Using torch dtype({self.torch_dtype}) for weights loading and export"
         )
 
-        with TemporaryDirectory() as tmpdirname:
-            if config.no_weights:
-                raise NotImplementedError(
-                    "no_weights is not supported for openvino backend"
-                )
-            else:
-                self.load_model_from_pretrained(config)
+        artifacts_dir = self.load_artifacts_from_cache(config)
+        if artifacts_dir is not None:
+            self.load_model_from_artifacts(config, artifacts_dir)
+        else:
+            with TemporaryDirectory() as tmpdirname:
+                if config.no_weights:
+                    self.load_model_from_config(config, tmpdirname)
+                else:
+                    self.load_model_from_pretrained(config)
+
+                if config.quantization:
+                    self.quantize(config, tmpdirname)
 
-            if config.quantization:
-                self.quantize(config, tmpdirname)
+                self.save_artifacts_to_cache(config)
 
         self.reshape = config.reshape
         if self.reshape:
@@ -107,6 +147,7 @@ class OVBackend(Backend):
         if self.half:
             LOGGER.info("\t+ Model will be converted to half precision and compiled")
 
+    @TRACER.span("backend.load_model")
     def load_model_from_pretrained(self, config: OVConfig) -> None:
         if self.torch_dtype is not None and self.torch_dtype != torch.float32:
             raise NotImplementedError(
@@ -116,15 +157,58 @@ class OVBackend(Backend):
             model_id=self.model,
             use_merged=config.use_merged,
             export=config.export,
+            ov_config=self.ov_config,
+            **self.hub_kwargs,
+        )
+
+    @TRACER.span("backend.load_model")
+    def load_model_from_config(self, config: OVConfig, tmpdirname: str) -> None:
+        if self.is_diffusion_pipeline():
+            raise NotImplementedError(
+                "no_weights is not supported for diffusion pipelines with openvino backend"
+            )
+
+        from optimum_benchmark.backends.utils import save_dummy_model
+
+        LOGGER.info("\t+ Saving model with random weights")
+        save_dummy_model(
+            automodel_class=self.automodel_class,
+            pretrained_config=self.pretrained_config,
+            output_dir=f"{tmpdirname}/random_model",
+            model_name_or_path=self.model,
+            torch_dtype=self.torch_dtype,
             **self.hub_kwargs,
         )
 
+        LOGGER.info("\t+ Exporting model with random weights to openvino")
+        self.pretrained_model = self.ovmodel_class.from_pretrained(
+            model_id=f"{tmpdirname}/random_model",
+            use_merged=config.use_merged,
+            export=True,
+            ov_config=self.ov_config,
+            trust_remote_code=self.hub_kwargs.get("trust_remote_code", False),
+        )
+
+    @TRACER.span("backend.load_model")
+    def load_model_from_artifacts(self, config: OVConfig, artifacts_dir: str) -> None:
+        LOGGER.info("\t+ Loading cached model in openvino")
+        self.pretrained_model = self.ovmodel_class.from_pretrained(
+            model_id=artifacts_dir,
+            use_merged=config.use_merged,
+            export=False,
+            ov_config=self.ov_config,
+        )
+
+    @TRACER.span("backend.quantize")
     def quantize(self, config: OVConfig, tmpdirname: str) -> None:
         LOGGER.info("\t+ Attempting quantization")
 
         from optimum.intel import OVConfig as OVQuantizationConfig, OVQuantizer
 
-        model = self.automodel_class.from_pretrained(self.model, **self.hub_kwargs)
+        if config.no_weights:
+            model = self.automodel_class.from_pretrained(f"{tmpdirname}/random_model")
+        else:
+            model = self.automodel_class.from_pretrained(self.model, **self.hub_kwargs)
         quantizer = OVQuantizer.from_pretrained(model)
         quantization_config = OVQuantizationConfig(
             **config.quantization_config,
@@ -151,8 +235,10 @@ class OVBackend(Backend):
         LOGGER.info("\t+ Loading quantized model")
         self.pretrained_model = self.ovmodel_class.from_pretrained(
             model_id=f"{tmpdirname}/quantized",
+            ov_config=self.ov_config,
         )
 
+    @TRACER.span("backend.prepare_for_inference")
     def prepare_for_inference(self, input_shapes: Dict[str, int]) -> None:
         if self.reshape:
             static_shapes = {
@@ -171,6 +257,17 @@ class OVBackend(Backend):
             LOGGER.info(f"\t+ Compiling model")
             self.pretrained_model.compile()
 
+    def prepare_for_profiling(
+        self,
+        input_names: List[str],
+        input_shapes: Dict[str, int],
+    ) -> None:
+        from optimum_benchmark.profilers.ov_profiler import OVProfilingWrapper
+
+        LOGGER.info("Preparing model for profiling")
+        LOGGER.info("\t+ Wrapping model inside profiler")
+        self.pretrained_model = OVProfilingWrapper(self.pretrained_model)
+
     def forward(self, input: Dict[str, Tensor], **kwargs) -> Tensor:
         output = self.pretrained_model(**input, **kwargs)[0]
 
@@ -181,5 +278,60 @@ class OVBackend(Backend):
 
         return output
 
+    def forward_async(
+        self, input: Dict[str, Tensor], requests: int, duration: float
+    ) -> Tuple[List[float], float]:
+        from openvino.runtime import AsyncInferQueue, CompiledModel
+
+        if self.is_text_generation_model() or self.is_diffusion_pipeline():
+            raise NotImplementedError(
+                "Asynchronous inference is only supported for single model tasks"
+            )
+
+        # optimum-intel models hold either a compiled model or an infer request
+        compiled_model = self.pretrained_model.request
+        if not isinstance(compiled_model, CompiledModel):
+            compiled_model = compiled_model.get_compiled_model()
+
+        if requests == 0:
+            requests = compiled_model.get_property("OPTIMAL_NUMBER_OF_INFER_REQUESTS")
+        LOGGER.info(
+            f"\t+ Running {requests} asynchronous infer requests "
+            f"on {compiled_model.get_property('NUM_STREAMS')} streams"
+        )
+
+        input_names = {
+            name
+            for model_input in compiled_model.inputs
+            for name in model_input.get_names()
+        }
+        inputs = {
+            name: tensor.numpy() for name, tensor in input.items() if name in input_names
+        }
+
+        latencies: List[float] = []
+
+        def callback(request, start: float) -> None:
+            latencies.append(time.perf_counter() - start)
+
+        infer_queue = AsyncInferQueue(compiled_model, requests)
+        infer_queue.set_callback(callback)
+
+        # a first inference per request, they can have their own warmup
+        for _ in range(requests):
+            infer_queue.start_async(inputs, userdata=time.perf_counter())
+        infer_queue.wait_all()
+        latencies.clear()
+
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            # latencies shouldn't include the wait for an idle request
+            infer_queue.get_idle_request_id()
+            infer_queue.start_async(inputs, userdata=time.perf_counter())
+        infer_queue.wait_all()
+        elapsed = time.perf_counter() - start
+
+        return latencies, elapsed
+
     def train(self, **kwargs) -> None:
         pass
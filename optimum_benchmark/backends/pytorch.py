@@ -5,6 +5,13 @@ from logging import getLogger
 from datasets import Dataset
 from torch import Tensor
 import torch
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+import itertools
+import inspect
+import operator
+import json
+import io
 import os
 import time
 
@@ -12,26 +19,43 @@ from torch.distributed.launcher.api import elastic_launch, LaunchConfig
 from torch.distributed.elastic.multiprocessing import Std
 import logging.config
 
-from transformers.utils import ModelOutput
+from transformers.utils import ModelOutput, SAFE_WEIGHTS_NAME, SAFE_WEIGHTS_INDEX_NAME
 from transformers import Trainer, TrainingArguments, TrainerCallback
 from transformers.utils.fx import symbolic_trace
 from transformers.trainer_utils import TrainOutput
 from optimum.bettertransformer import BetterTransformer
 
 from optimum_benchmark.backends.base import Backend, BackendConfig
+from optimum_benchmark.tracing import TRACER
 from optimum_benchmark.profilers.fx_profiler import FXProfilingWrapper
+from optimum_benchmark.profilers.module_profiler import ModuleProfilingWrapper
+from optimum_benchmark.trackers.load import LoadTracker, significant_figures
+from optimum_benchmark.generators.input_generator import InputGenerator
+from optimum_benchmark.utils import get_cpu_isa_features
 
 if TYPE_CHECKING:
     from transformers import TrainerState, TrainerControl
 
 WARMUP_STEPS = 40
 
+# kernels of scaled_dot_product_attention, named after torch's SDPBackend
+SDPA_KERNELS = ["math", "flash_attention", "efficient_attention", "cudnn_attention"]
+ATTENTION_IMPLEMENTATIONS = [
+    "eager",
+    "sdpa",
+    *[f"sdpa_{kernel}" for kernel in SDPA_KERNELS],
+    "flash_attention_2",
+    "bettertransformer",
+]
+
 # bachend logger
 LOGGER = getLogger("pytorch")
 
 # backend resolvers
+# profiling runs forward passes only, so it's treated as an inference benchmark
 OmegaConf.register_new_resolver(
-    "is_inference", lambda benchmark_name: benchmark_name == "inference"
+    "is_inference",
+    lambda benchmark_name: benchmark_name in ["inference", "profiling", "compile"],
 )
 
 
@@ -45,13 +69,32 @@ class PyTorchConfig(BackendConfig):
     no_weights: bool = False
     torch_dtype: Optional[str] = None
     device_map: Optional[str] = None
+    # loads safetensors checkpoints directly in an uninitialized model,
+    # reading shards in parallel (defaults to one thread per shard)
+    fast_load: bool = False
+    fast_load_workers: Optional[int] = None
 
     # quantization options
     load_in_8bit: bool = False
     load_in_4bit: bool = False
+    # native cpu int8 quantization, done once the input shapes are known:
+    # dynamic (linear and lstm weights, activations quantized on the fly) or
+    # static (pt2e with the x86 inductor quantizer, calibrated on generated
+    # inputs, which is lowered to int8 kernels with torch_compile)
+    quantization: Optional[str] = None
+    quantization_config: Dict = field(
+        default_factory=lambda: {
+            "calibration_batches": 8,
+        }
+    )
 
     # optimization options
     bettertransformer: bool = False
+    # attention implementation: eager, sdpa (kernel dispatched by pytorch),
+    # sdpa_<kernel> (a single sdpa kernel enabled, see SDPA_KERNELS),
+    # flash_attention_2 or bettertransformer (fused encoder layers, running
+    # padded batches as nested tensors), the model's default when null
+    attention: Optional[str] = None
 
     # compilation options
     torch_compile: bool = False
@@ -64,16 +107,51 @@ class PyTorchConfig(BackendConfig):
             "disable": False,
         }
     )
-    # amp options
+
+    # torchscript options, the forward pass is traced with the benchmark's
+    # input shapes, frozen and optimized for inference (e.g. oneDNN fusions),
+    # generation keeps using the eager model
+    jit: bool = False
+    jit_config: Dict = field(
+        default_factory=lambda: {
+            "freeze": True,
+            "optimize_for_inference": True,
+        }
+    )
+
+    # generation options
+    # static: the kv cache is preallocated for the prompt and the new tokens,
+    # which gives the decoding steps static shapes, so that a forward pass
+    # compiled with torch_compile isn't recompiled at every new token
+    cache_implementation: Optional[str] = None
+
+    # amp options, on cpu autocast is only enabled with native support of
+    # its dtype (avx512_bf16/amx_bf16 or avx512_fp16/amx_fp16)
     amp_autocast: bool = False
     amp_dtype: Optional[str] = None
 
+    # cpu options
+    # channels last memory format of the model and 4D inputs (vision models)
+    channels_last: bool = False
+    # linear and convolution weights prepacked in oneDNN's layout
+    mkldnn_prepack: bool = False
+
     # inference options
     disable_grad: bool = "${is_inference:${benchmark.name}}"  # type: ignore
     eval_mode: bool = "${is_inference:${benchmark.name}}"  # type: ignore
 
+    # profiling options
+    # fx: symbolically traces the model and times each node
+    # hooks: times submodules up to profiler_depth with forward hooks,
+    # which works with any eager model and with generation
+    profiler: str = "fx"
+    profiler_depth: int = 4
+
 
 class PyTorchBackend(Backend):
+    # only random weights are cached, when loading with no_weights
+    artifacts_config_keys = ["no_weights", "torch_dtype"]
+
     def __init__(self, model: str, task: str, device: str, hub_kwargs: DictConfig):
         super().__init__(model, task, device, hub_kwargs)
 
@@ -111,11 +189,23 @@ class PyTorchBackend(Backend):
             else config.torch_dtype  # in case of string or None
         )
 
+        # attention implementation, set when loading the model
+        self.configure_attention(config)
+
         # Load model
-        if config.no_weights:
-            self.load_model_from_config(config)
-        else:
-            self.load_model_from_pretrained(config)
+        load_tracker = LoadTracker()
+        with load_tracker.track():
+            if config.no_weights:
+                self.load_model_from_config(config)
+            else:
+                self.load_model_from_pretrained(config)
+        self.metrics.update(
+            load_tracker.get_metrics(loaded_bytes=get_model_size(self.pretrained_model))
+        )
+        LOGGER.info(
+            f"\t+ Loaded model in {self.metrics['load_time(s)']} (s) "
+            f"at {self.metrics['load_throughput(GB/s)']} (GB/s)"
+        )
 
         # Turn on eval mode
         if config.eval_mode and self.task not in [
@@ -125,33 +215,176 @@ class PyTorchBackend(Backend):
             LOGGER.info("\t+ Turning on eval mode")
             self.pretrained_model.eval()
 
+        if hasattr(self.pretrained_model, "config"):
+            # transformers falls back to another implementation when unsupported
+            self.metrics["attn_implementation"] = getattr(
+                self.pretrained_model.config, "_attn_implementation", None
+            )
+
         # Turn on better transformer inference
-        if config.bettertransformer:
+        if self.bettertransformer:
             LOGGER.info("\t+ Using optimum.bettertransformer")
-            self.pretrained_model = BetterTransformer.transform(  # type: ignore
-                self.pretrained_model, keep_original_model=False
-            )
+            with TRACER.span("backend.bettertransformer"):
+                self.pretrained_model = BetterTransformer.transform(  # type: ignore
+                    self.pretrained_model, keep_original_model=False
+                )
 
-        # Compile model
-        if config.torch_compile:
-            LOGGER.info("\t+ Using torch.compile on forward pass")
-            self.pretrained_model.forward = torch.compile(
-                self.pretrained_model.forward,
-                **config.torch_compile_config,
+        if config.channels_last:
+            LOGGER.info("\t+ Converting model to channels last memory format")
+            self.pretrained_model.to(memory_format=torch.channels_last)
+        self.channels_last = config.channels_last
+
+        if config.mkldnn_prepack:
+            self.mkldnn_prepack()
+
+        if config.quantization not in [None, "dynamic", "static"]:
+            raise ValueError(
+                f"Unknown quantization {config.quantization}, expected dynamic or static"
+            )
+        if self.is_diffusion_pipeline() and (
+            config.jit or config.quantization is not None
+        ):
+            raise NotImplementedError(
+                "jit and quantization are not supported for diffusion pipelines"
+            )
+        if config.jit and config.quantization == "static":
+            raise ValueError("jit can't be used with static quantization")
+        if config.quantization == "static" and self.is_text_generation_model():
+            # only the exported forward pass is quantized, generate would run
+            # the original model and report unquantized decoding latencies
+            raise NotImplementedError(
+                "Static quantization is not supported for text generation models"
             )
+        # traced or quantized in prepare_for_inference, once the input shapes are known
+        self.jit_model = None
+        self.jit_input_shapes = None
+        self.exported_model = None
+        self.quantized = False
+        self.quantization_input_shapes = None
+
+        if config.cache_implementation is not None:
+            self.configure_cache(config)
+
+        # Compile model, after quantization when quantizing
+        if config.torch_compile and config.quantization is None:
+            self.compile_model(config)
 
         # pytorch autocast
-        if config.amp_autocast:
-            LOGGER.info(
-                f"\t+ Enabling Automatic Mixed Precision with dtype: {self.amp_dtype}"
-            )
         self.amp_autocast = config.amp_autocast
         self.amp_dtype = (
             getattr(torch, config.amp_dtype)  # in case of torch.dtype
             if config.amp_dtype is not None and hasattr(torch, config.amp_dtype)
             else None
         )
+        if self.amp_autocast and self.device.type == "cpu":
+            # autocast defaults to bfloat16 on cpu
+            amp_dtype = self.amp_dtype or torch.bfloat16
+            if not is_cpu_dtype_supported(amp_dtype):
+                # emulated low precision is slower than float32
+                LOGGER.warning(
+                    f"\t+ {amp_dtype} isn't natively supported by this cpu, "
+                    "disabling Automatic Mixed Precision"
+                )
+                self.amp_autocast = False
+            self.metrics["amp_autocast"] = self.amp_autocast
+        if self.amp_autocast:
+            LOGGER.info(
+                f"\t+ Enabling Automatic Mixed Precision with dtype: {self.amp_dtype}"
+            )
 
+    def configure_attention(self, config: PyTorchConfig) -> None:
+        self.bettertransformer = config.bettertransformer
+        self.sdpa_kernel = None
+        self.attention_kwargs = {}
+
+        if config.attention is None:
+            return
+        if config.attention not in ATTENTION_IMPLEMENTATIONS:
+            raise ValueError(
+                f"Unknown attention {config.attention}, "
+                f"expected one of {ATTENTION_IMPLEMENTATIONS}"
+            )
+        if self.is_diffusion_pipeline():
+            raise NotImplementedError(
+                "attention implementations are not supported for diffusion pipelines"
+            )
+        if config.bettertransformer and config.attention != "bettertransformer":
+            raise ValueError(
+                f"bettertransformer can't be used with {config.attention} attention"
+            )
+
+        LOGGER.info(f"\t+ Using {config.attention} attention")
+        if config.attention == "bettertransformer":
+            # bettertransformer replaces the eager attention layers
+            self.bettertransformer = True
+            attn_implementation = "eager"
+        elif config.attention.startswith("sdpa_"):
+            self.sdpa_kernel = config.attention[len("sdpa_") :]
+            attn_implementation = "sdpa"
+        else:
+            attn_implementation = config.attention
+
+        self.attention_kwargs = {"attn_implementation": attn_implementation}
+
+    def configure_cache(self, config: PyTorchConfig) -> None:
+        if not self.is_text_generation_model():
+            raise ValueError(
+                "cache_implementation is only supported by text generation models"
+            )
+
+        LOGGER.info(f"\t+ Using {config.cache_implementation} kv cache for generation")
+        generation_config = self.pretrained_model.generation_config
+        # sized by generate from the prompt length and max_new_tokens
+        generation_config.cache_implementation = config.cache_implementation
+        # recent transformers compile the decoding steps themselves with a static
+        # cache, compilation is left to torch_compile for comparable results
+        generation_config.disable_compile = True
+
+        if config.torch_compile and config.cache_implementation != "static":
+            LOGGER.warning(
+                "\t+ The compiled forward pass will be recompiled "
+                "at every decoding step without a static kv cache"
+            )
+
+    def compile_model(self, config: PyTorchConfig) -> None:
+        compile_cache_dir = self.get_compile_cache_dir(config)
+        if compile_cache_dir is not None:
+            import torch._inductor.config as inductor_config
+
+            # the code cache is always on, the fx graph cache since torch 2.1
+            os.environ["TORCHINDUCTOR_CACHE_DIR"] = compile_cache_dir
+            if hasattr(inductor_config, "fx_graph_cache"):
+                inductor_config.fx_graph_cache = True
+
+        if self.exported_model is not None:
+            LOGGER.info("\t+ Using torch.compile on quantized model")
+            self.exported_model = torch.compile(
+                self.exported_model,
+                **config.torch_compile_config,
+            )
+        else:
+            LOGGER.info("\t+ Using torch.compile on forward pass")
+            self.pretrained_model.forward = torch.compile(
+                self.pretrained_model.forward,
+                **config.torch_compile_config,
+            )
+
+    @TRACER.span("backend.mkldnn_prepack")
+    def mkldnn_prepack(self) -> None:
+        from torch.utils import mkldnn
+
+        if self.device.type != "cpu":
+            raise ValueError("mkldnn_prepack is only supported on cpu")
+
+        # weights are prepacked in the model's dtype, float32 or bfloat16
+        dtype = self.pretrained_model.dtype
+        if dtype not in [torch.float32, torch.bfloat16]:
+            raise ValueError(f"mkldnn_prepack isn't supported with dtype {dtype}")
+
+        LOGGER.info(f"\t+ Prepacking linear and convolution weights in {dtype}")
+        self.pretrained_model = mkldnn.to_mkldnn(self.pretrained_model, dtype=dtype)
+
+    @TRACER.span("backend.load_model")
     def load_model_from_config(self, config: PyTorchConfig) -> None:
         LOGGER.info(
             f"\t+ Loading model from config in dtype : "
@@ -165,12 +398,29 @@ class PyTorchBackend(Backend):
             quantize_dummy_model,
         )
 
+        # randomized weights are memory-mapped from the artifacts cache if any
+        if not (config.load_in_8bit or config.load_in_4bit):
+            artifacts_dir = self.load_artifacts_from_cache(config)
+            if artifacts_dir is not None:
+                LOGGER.info(f"\t+ Loading cached random weights on device: {self.device}")
+                with self.device:
+                    self.pretrained_model = self.automodel_class.from_pretrained(
+                        pretrained_model_name_or_path=artifacts_dir,
+                        torch_dtype=self.torch_dtype,
+                        trust_remote_code=self.hub_kwargs.get(
+                            "trust_remote_code", False
+                        ),
+                        **self.attention_kwargs,
+                    )
+                return
+
         LOGGER.info("\t+ Initializing empty weights model on device: meta")
         with init_empty_weights():
             self.pretrained_model = self.automodel_class.from_config(
                 config=self.pretrained_config,
                 torch_dtype=self.torch_dtype,
                 trust_remote_code=self.hub_kwargs.get("trust_remote_code", False),
+                **self.attention_kwargs,
             )
 
         if config.load_in_8bit or config.load_in_4bit:
@@ -211,18 +461,28 @@ class PyTorchBackend(Backend):
             randomize_weights(self.pretrained_model)
             self.pretrained_model.tie_weights()
 
+            self.save_artifacts_to_cache(config, safe_serialization=True)
+
+    @TRACER.span("backend.load_model")
     def load_model_from_pretrained(self, config: PyTorchConfig) -> None:
         LOGGER.info(
             f"\t+ Loading pretrained model weights in dtype: {config.torch_dtype} on device: {self.device}"
         )
         if self.task not in ["stable-diffusion", "stable-diffusion-xl"]:
-            kwargs = {}
+            kwargs = dict(self.attention_kwargs)
             if config.load_in_8bit:
                 kwargs["load_in_8bit"] = config.load_in_8bit
                 kwargs["llm_int8_threshold"] = 0
             elif config.load_in_4bit:
                 kwargs["load_in_4bit"] = config.load_in_4bit
             
+            if config.fast_load and not (
+                config.device_map or config.load_in_8bit or config.load_in_4bit
+            ):
+                if self.load_model_with_fast_load(config):
+                    return
+                LOGGER.info("\t+ Falling back to from_pretrained")
+
             if config.device_map:
                 kwargs["device_map"] = config.device_map if config.device_map is not None else self.device
 
@@ -252,6 +512,255 @@ class PyTorchBackend(Backend):
                 # Diffusers does not support device_map being a torch.device, thus if not provided, move to device here.
                 self.pretrained_model.to(self.device)
 
+    def load_model_with_fast_load(self, config: PyTorchConfig) -> bool:
+        """
+        Loads the model's safetensors shards in parallel and assigns them to
+        a model instantiated without initializing its weights. Shards are
+        memory-mapped, so on cpu the weights are only paged in when used.
+        Returns False when the checkpoint can't be loaded this way.
+        """
+
+        from accelerate import init_empty_weights
+        from safetensors.torch import load_file
+
+        # tensors are assigned to the empty model since torch 2.1
+        if "assign" not in inspect.signature(torch.nn.Module.load_state_dict).parameters:
+            LOGGER.info("\t+ Fast loading requires torch>=2.1")
+            return False
+
+        checkpoint_files = get_safetensors_checkpoint(self.model, self.hub_kwargs)
+        if len(checkpoint_files) == 0:
+            LOGGER.info("\t+ No safetensors checkpoint found")
+            return False
+
+        LOGGER.info("\t+ Initializing empty weights model on device: meta")
+        with init_empty_weights():
+            model = self.automodel_class.from_config(
+                config=self.pretrained_config,
+                torch_dtype=self.torch_dtype if self.torch_dtype != "auto" else None,
+                trust_remote_code=self.hub_kwargs.get("trust_remote_code", False),
+                **self.attention_kwargs,
+            )
+
+        # like from_pretrained, weights are loaded in the default dtype if none is given
+        if self.torch_dtype is None:
+            dtype = torch.get_default_dtype()
+        elif self.torch_dtype == "auto":
+            dtype = None
+        else:
+            dtype = self.torch_dtype
+
+        def load_shard(checkpoint_file: str) -> Dict[str, Tensor]:
+            shard = load_file(checkpoint_file, device=str(self.device))
+            if dtype is not None:
+                for name, tensor in shard.items():
+                    if tensor.is_floating_point():
+                        shard[name] = tensor.to(dtype)
+            return shard
+
+        LOGGER.info(
+            f"\t+ Loading {len(checkpoint_files)} safetensors shards "
+            f"on device: {self.device}"
+        )
+        state_dict = {}
+        with ThreadPoolExecutor(
+            max_workers=config.fast_load_workers or len(checkpoint_files)
+        ) as executor:
+            for shard in executor.map(load_shard, checkpoint_files):
+                state_dict.update(shard)
+
+        state_dict = match_state_dict_prefix(state_dict, model)
+        model.load_state_dict(state_dict, strict=False, assign=True)
+        model.tie_weights()
+
+        # e.g. checkpoints with legacy parameter names
+        missing_tensors = [
+            name
+            for name, tensor in itertools.chain(
+                model.named_parameters(), model.named_buffers()
+            )
+            if tensor.is_meta
+        ]
+        if len(missing_tensors) > 0:
+            LOGGER.warning(
+                f"\t+ Tensors missing from the checkpoint: {missing_tensors[:5]}..."
+            )
+            return False
+
+        # non-persistent buffers (e.g. causal masks, rotary frequencies) aren't in
+        # the checkpoint, they were initialized on cpu with the empty model
+        model.to(self.device)
+
+        self.pretrained_model = model
+        return True
+
+    @TRACER.span("backend.prepare_for_inference")
+    def prepare_for_inference(self, input_shapes: Dict[str, int]) -> None:
+        if self.config.quantization == "dynamic" and not self.quantized:
+            self.quantize(input_shapes)
+
+        # the static quantized model is exported for the given input shapes
+        if (
+            self.config.quantization == "static"
+            and self.quantization_input_shapes != dict(input_shapes)
+        ):
+            self.quantize(input_shapes)
+
+        if self.config.jit and self.jit_input_shapes != dict(input_shapes):
+            self.jit_trace(input_shapes)
+
+    def generate_inputs(self, input_shapes: Dict[str, int]) -> Dict[str, Tensor]:
+        input_generator = InputGenerator(
+            task=self.task,
+            input_shapes=input_shapes,
+            pretrained_config=self.pretrained_config,
+        )
+
+        return {
+            key: value.to(self.device)
+            for key, value in input_generator.generate(mode="forward").items()
+        }
+
+    @TRACER.span("backend.quantize")
+    def quantize(self, input_shapes: Dict[str, int]) -> None:
+        if self.device.type != "cpu":
+            raise ValueError("quantization is only supported on cpu")
+
+        # the quantized model's outputs are compared to the original model's
+        quantization_input = self.generate_inputs(input_shapes)
+        reference_output = get_first_output(self.pretrained_model(**quantization_input))
+        model_size = get_serialized_size(self.pretrained_model)
+
+        start = time.perf_counter()
+        if self.config.quantization == "dynamic":
+            LOGGER.info("\t+ Quantizing linear and lstm layers dynamically")
+            self.pretrained_model = torch.ao.quantization.quantize_dynamic(
+                self.pretrained_model,
+                {torch.nn.Linear, torch.nn.LSTM},
+                dtype=torch.qint8,
+            )
+            quantized_model = self.pretrained_model
+        else:
+            self.exported_model = self.quantize_pt2e(input_shapes, quantization_input)
+            quantized_model = self.exported_model
+        quantization_time = time.perf_counter() - start
+
+        quantized_output = get_first_output(quantized_model(**quantization_input))
+        quantized_model_size = get_serialized_size(quantized_model)
+        error = (quantized_output.float() - reference_output.float()).abs()
+
+        self.metrics.update(
+            {
+                "quantization_time(s)": significant_figures(quantization_time),
+                "model_size(MB)": significant_figures(model_size / 1e6),
+                "quantized_model_size(MB)": significant_figures(
+                    quantized_model_size / 1e6
+                ),
+                "quantization_max_abs_error": significant_figures(error.max().item()),
+                "quantization_relative_error": significant_figures(
+                    (error.norm() / reference_output.float().norm()).item()
+                ),
+            }
+        )
+        LOGGER.info(
+            f"\t+ Quantized model in {self.metrics['quantization_time(s)']} (s), "
+            f"relative error: {self.metrics['quantization_relative_error']}"
+        )
+        self.quantized = True
+        self.quantization_input_shapes = dict(input_shapes)
+
+        if self.config.torch_compile:
+            self.compile_model(self.config)
+
+    def quantize_pt2e(
+        self, input_shapes: Dict[str, int], quantization_input: Dict[str, Tensor]
+    ) -> torch.nn.Module:
+        try:
+            from torch.ao.quantization.quantize_pt2e import prepare_pt2e, convert_pt2e
+            from torch.ao.quantization.quantizer.x86_inductor_quantizer import (
+                X86InductorQuantizer,
+                get_default_x86_inductor_quantization_config,
+            )
+        except ImportError:
+            # pt2e quantization moved to torchao in recent versions of torch
+            try:
+                from torchao.quantization.pt2e.quantize_pt2e import (
+                    prepare_pt2e,
+                    convert_pt2e,
+                )
+                from torchao.quantization.pt2e.quantizer.x86_inductor_quantizer import (
+                    X86InductorQuantizer,
+                    get_default_x86_inductor_quantization_config,
+                )
+            except ImportError:
+                raise ImportError(
+                    "Static quantization requires torchao with this version of torch "
+                    f"({torch.__version__}), please install it with `pip install torchao`"
+                )
+
+        LOGGER.info("\t+ Exporting model for static quantization")
+        # the cache can't be an output of an exported function
+        use_cache = getattr(self.pretrained_model.config, "use_cache", None)
+        self.pretrained_model.config.use_cache = False
+        if hasattr(torch.export, "export_for_training"):
+            exported_model = torch.export.export_for_training(
+                self.pretrained_model, args=(), kwargs=quantization_input
+            ).module()
+        elif hasattr(torch._export, "capture_pre_autograd_graph"):
+            exported_model = torch._export.capture_pre_autograd_graph(
+                self.pretrained_model, args=(), kwargs=quantization_input
+            )
+        else:
+            exported_model = torch.export.export(
+                self.pretrained_model, args=(), kwargs=quantization_input
+            ).module()
+        self.pretrained_model.config.use_cache = use_cache
+
+        quantizer = X86InductorQuantizer()
+        quantizer.set_global(get_default_x86_inductor_quantization_config())
+        prepared_model = prepare_pt2e(exported_model, quantizer)
+
+        calibration_batches = self.config.quantization_config.calibration_batches
+        LOGGER.info(f"\t+ Calibrating on {calibration_batches} generated batches")
+        prepared_model(**quantization_input)
+        for _ in range(calibration_batches - 1):
+            prepared_model(**self.generate_inputs(input_shapes))
+
+        LOGGER.info("\t+ Converting model to int8")
+        return convert_pt2e(prepared_model)
+
+    @TRACER.span("backend.jit_trace")
+    def jit_trace(self, input_shapes: Dict[str, int]) -> None:
+        jit_input = self.generate_inputs(input_shapes)
+
+        LOGGER.info(f"\t+ Tracing model with torch.jit.trace: {list(jit_input)}")
+        start = time.perf_counter()
+        # the cache can't be an output of a traced function
+        use_cache = getattr(self.pretrained_model.config, "use_cache", None)
+        self.pretrained_model.config.use_cache = False
+        with torch.autocast(
+            device_type=self.device.type,
+            dtype=self.amp_dtype,
+            enabled=self.amp_autocast,
+        ):
+            jit_model = torch.jit.trace(
+                self.pretrained_model,
+                example_kwarg_inputs=jit_input,
+                strict=False,
+                check_trace=False,
+            )
+            if self.config.jit_config.freeze:
+                LOGGER.info("\t+ Freezing traced model")
+                jit_model = torch.jit.freeze(jit_model)
+            if self.config.jit_config.optimize_for_inference:
+                LOGGER.info("\t+ Optimizing traced model for inference")
+                jit_model = torch.jit.optimize_for_inference(jit_model)
+        self.pretrained_model.config.use_cache = use_cache
+
+        self.jit_model = jit_model
+        self.jit_input_shapes = dict(input_shapes)
+        self.metrics["jit_time(s)"] = significant_figures(time.perf_counter() - start)
+
     def prepare_for_profiling(
         self,
         input_names: List[str],
@@ -259,31 +768,66 @@ class PyTorchBackend(Backend):
     ) -> None:
         LOGGER.info("Preparing model for profiling")
 
-        LOGGER.info("\t+ Symbolicly tracing model")
-        self.pretrained_model = symbolic_trace(
-            model=self.pretrained_model,
-            input_names=input_names,
-        )
+        if self.jit_model is not None or self.exported_model is not None:
+            LOGGER.info("\t+ Profiling the eager model instead of the traced one")
+            self.jit_model = None
+            self.jit_input_shapes = None
+            self.exported_model = None
 
-        LOGGER.info("\t+ Wrapping model with FXProfilingWrapper")
-        self.pretrained_model = FXProfilingWrapper(self.pretrained_model)
+        if self.config.profiler == "fx":
+            LOGGER.info("\t+ Symbolicly tracing model")
+            self.pretrained_model = symbolic_trace(
+                model=self.pretrained_model,
+                input_names=input_names,
+            )
 
-    def forward(self, input: Dict[str, Tensor], **kwargs) -> ModelOutput:
+            LOGGER.info("\t+ Wrapping model with FXProfilingWrapper")
+            self.pretrained_model = FXProfilingWrapper(self.pretrained_model)
+        elif self.config.profiler == "hooks":
+            LOGGER.info(
+                f"\t+ Wrapping model with ModuleProfilingWrapper "
+                f"(depth={self.config.profiler_depth})"
+            )
+            self.pretrained_model = ModuleProfilingWrapper(
+                self.pretrained_model, depth=self.config.profiler_depth
+            )
+        else:
+            raise ValueError(
+                f"Unknown profiler {self.config.profiler}, expected fx or hooks"
+            )
+
+    @contextmanager
+    def inference_context(self):
+        # autocast and the sdpa kernel apply to any call of the model
         with torch.autocast(
             device_type=self.device.type,
             dtype=self.amp_dtype,
             enabled=self.amp_autocast,
-        ):
-            output = self.pretrained_model(**input, **kwargs)
+        ), get_sdpa_kernel_context(self.sdpa_kernel):
+            yield
+
+    def forward(self, input: Dict[str, Tensor], **kwargs) -> ModelOutput:
+        # the traced model returns a dict of tensors instead of a ModelOutput
+        if self.jit_model is not None:
+            model = self.jit_model
+        elif self.exported_model is not None:
+            model = self.exported_model
+        else:
+            model = self.pretrained_model
+
+        if self.channels_last:
+            convert_to_channels_last(input)
+
+        with self.inference_context():
+            output = model(**input, **kwargs)
 
         return output
 
     def generate(self, input: Dict[str, Tensor], **kwargs) -> ModelOutput:
-        with torch.autocast(
-            device_type=self.device.type,
-            dtype=self.amp_dtype,
-            enabled=self.amp_autocast,
-        ):
+        if self.channels_last:
+            convert_to_channels_last(input)
+
+        with self.inference_context():
             output = self.pretrained_model.generate(**input, **kwargs)
 
         return output
@@ -322,6 +866,160 @@ class PyTorchBackend(Backend):
         return results
 
 
+def get_safetensors_checkpoint(model: str, hub_kwargs: Dict[str, Any]) -> List[str]:
+    if os.path.isdir(model):
+        model_dir = model
+    else:
+        from huggingface_hub import snapshot_download
+
+        model_dir = snapshot_download(
+            repo_id=model,
+            revision=hub_kwargs.get("revision", None),
+            cache_dir=hub_kwargs.get("cache_dir", None),
+            force_download=hub_kwargs.get("force_download", False),
+            local_files_only=hub_kwargs.get("local_files_only", False),
+            token=hub_kwargs.get("use_auth_token", None),
+            allow_patterns=[SAFE_WEIGHTS_NAME, SAFE_WEIGHTS_INDEX_NAME],
+        )
+
+    index_file = os.path.join(model_dir, SAFE_WEIGHTS_INDEX_NAME)
+    if os.path.exists(index_file):
+        # sharded checkpoints are only downloaded along with their index
+        with open(index_file) as file_obj:
+            shards = sorted(set(json.load(file_obj)["weight_map"].values()))
+        if not os.path.isdir(model):
+            model_dir = snapshot_download(
+                repo_id=model,
+                revision=hub_kwargs.get("revision", None),
+                cache_dir=hub_kwargs.get("cache_dir", None),
+                local_files_only=hub_kwargs.get("local_files_only", False),
+                token=hub_kwargs.get("use_auth_token", None),
+                allow_patterns=shards,
+            )
+        return [os.path.join(model_dir, shard) for shard in shards]
+
+    checkpoint_file = os.path.join(model_dir, SAFE_WEIGHTS_NAME)
+    if os.path.exists(checkpoint_file):
+        return [checkpoint_file]
+
+    return []
+
+
+def match_state_dict_prefix(
+    state_dict: Dict[str, Tensor], model: torch.nn.Module
+) -> Dict[str, Tensor]:
+    # a base model checkpoint loaded in a model with a head, or the opposite
+    prefix = f"{model.base_model_prefix}."
+    expected_keys = set(model.state_dict().keys())
+
+    if any(key in expected_keys for key in state_dict):
+        return state_dict
+    elif any(prefix + key in expected_keys for key in state_dict):
+        return {prefix + key: value for key, value in state_dict.items()}
+    else:
+        return {
+            key[len(prefix) :] if key.startswith(prefix) else key: value
+            for key, value in state_dict.items()
+        }
+
+
+# instruction sets with native arithmetic in these dtypes
+CPU_DTYPES_ISA_FEATURES = {
+    torch.bfloat16: ["avx512_bf16", "amx_bf16"],
+    torch.float16: ["avx512_fp16", "amx_fp16"],
+}
+
+
+def is_cpu_dtype_supported(dtype: torch.dtype) -> bool:
+    if dtype not in CPU_DTYPES_ISA_FEATURES:
+        return True
+
+    isa_features = get_cpu_isa_features()
+    if isa_features is None:
+        # we only disable autocast when the features are known to be missing
+        return True
+
+    return any(feature in isa_features for feature in CPU_DTYPES_ISA_FEATURES[dtype])
+
+
+def get_first_output(output: Any) -> Tensor:
+    # model outputs, tuples or dicts of tensors (traced models)
+    if isinstance(output, dict):
+        return next(iter(output.values()))
+
+    return output[0]
+
+
+def get_serialized_size(model: torch.nn.Module) -> int:
+    if isinstance(model, torch.fx.GraphModule):
+        # exported models can also hold their (folded) weights as attributes
+        tensors = dict(model.state_dict())
+        for node in model.graph.nodes:
+            if node.op == "get_attr":
+                attribute = operator.attrgetter(node.target)(model)
+                if isinstance(attribute, Tensor):
+                    tensors[node.target] = attribute
+
+        storages = {
+            tensor.untyped_storage().data_ptr(): tensor.untyped_storage().nbytes()
+            for tensor in tensors.values()
+        }
+        return sum(storages.values())
+
+    # quantized weights are packed, they're not parameters nor buffers
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+
+    return buffer.tell()
+
+
+def get_sdpa_kernel_context(kernel: Optional[str]) -> Any:
+    # forward passes fail when the kernel can't run the attention
+    # (e.g. unsupported device, dtype, head dimension or mask)
+    if kernel is None:
+        return nullcontext()
+
+    try:
+        from torch.nn.attention import SDPBackend, sdpa_kernel
+
+        return sdpa_kernel(getattr(SDPBackend, kernel.upper()))
+    except ImportError:
+        # torch < 2.3
+        if kernel == "cudnn_attention":
+            raise ValueError("cudnn_attention requires torch>=2.3")
+
+        return torch.backends.cuda.sdp_kernel(
+            enable_math=kernel == "math",
+            enable_flash=kernel == "flash_attention",
+            enable_mem_efficient=kernel == "efficient_attention",
+        )
+
+
+def convert_to_channels_last(input: Dict[str, Any]) -> None:
+    # in place, so that inputs reused across passes are only converted once
+    for key, value in input.items():
+        if isinstance(value, Tensor) and value.dim() == 4:
+            input[key] = value.contiguous(memory_format=torch.channels_last)
+
+
+def get_model_size(model: Any) -> int:
+    # diffusion pipelines are made of several models
+    if isinstance(model, torch.nn.Module):
+        modules = [model]
+    else:
+        modules = [
+            component
+            for component in getattr(model, "components", {}).values()
+            if isinstance(component, torch.nn.Module)
+        ]
+
+    return sum(
+        tensor.numel() * tensor.element_size()
+        for module in modules
+        for tensor in itertools.chain(module.parameters(), module.buffers())
+    )
+
+
 def get_logger(name: Optional[str] = None, log_all: bool = False):
     """
     PyTorch DDP subprocesses do not inherit from Hydra logger. Thus, we need to reconfigure the logger for the workers.
@@ -1,4 +1,5 @@
 from typing import Any, Callable, Dict, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import os
 
@@ -25,17 +26,53 @@ from optimum.exporters.onnx import (
 )
 
 
-def randomize_weights(model):
-    for param in model.parameters():
-        if torch.cuda.is_available() and param.device.type == "cpu":
-            # we take advantage of the fact that a cuda device
-            # is available to use cuda kernels for randomization
-            # this is slower than asynchronous randomization while
-            # model is fully on gpu (because of data transfer) but
-            # faster than randomization while model is on cpu
-            param.data.cuda().normal_(mean=0.0, std=0.2).cpu()
-        else:
-            param.data.normal_(mean=0.0, std=0.2)
+# large enough to amortize the python overhead, small enough to balance threads
+RANDOMIZATION_CHUNK_SIZE = 2**22
+
+
+def randomize_weights(model, mean: float = 0.0, std: float = 0.2) -> None:
+    """
+    Fills the parameters of a model with random values. On cpu, parameters are
+    split in chunks which are filled in parallel, each with its own generator
+    (a shared generator would serialize the threads on its lock), seeded from
+    torch's initial seed so that the benchmark's seed is respected.
+    """
+
+    tensors = [param.data for param in model.parameters()]
+
+    if torch.cuda.is_available():
+        # we take advantage of the fact that a cuda device is available
+        # to use cuda kernels for the randomization of cpu parameters,
+        # which is faster despite the data transfer
+        for tensor in tensors:
+            if tensor.device.type == "cpu":
+                tensor.copy_(
+                    torch.empty_like(tensor, device="cuda").normal_(mean, std)
+                )
+            else:
+                tensor.normal_(mean, std)
+        return
+
+    chunks = []
+    for tensor in tensors:
+        if tensor.device.type != "cpu":
+            # e.g. mps, randomized with the device's default generator
+            tensor.normal_(mean, std)
+            continue
+        if not tensor.is_contiguous():
+            chunks.append(tensor)
+            continue
+        flat_tensor = tensor.view(-1)
+        chunks.extend(flat_tensor.split(RANDOMIZATION_CHUNK_SIZE))
+
+    seed = torch.initial_seed()
+
+    def randomize_chunk(chunk_index: int) -> None:
+        generator = torch.Generator().manual_seed((seed + chunk_index) % 2**64)
+        chunks[chunk_index].normal_(mean, std, generator=generator)
+
+    with ThreadPoolExecutor(max_workers=torch.get_num_threads()) as executor:
+        list(executor.map(randomize_chunk, range(len(chunks))))
 
 
 def format_ort_quantization_dict(quantization_dict: Dict[str, Any]) -> None:
@@ -119,6 +156,35 @@ def quantize_dummy_model(
     return model
 
 
+def save_dummy_model(
+    automodel_class,
+    pretrained_config: PretrainedConfig,
+    output_dir: str,
+    model_name_or_path: str,
+    torch_dtype: Optional[torch.dtype] = None,
+    **cache_kwargs,
+) -> None:
+    """
+    Saves a model with random weights built from its config, along with the
+    preprocessors of `model_name_or_path` when they can be loaded, for the
+    backends that export or quantize models from a directory.
+    """
+
+    from accelerate import init_empty_weights
+
+    with init_empty_weights():
+        model = automodel_class.from_config(
+            config=pretrained_config,
+            torch_dtype=torch_dtype,
+            trust_remote_code=cache_kwargs.get("trust_remote_code", False),
+        )
+    model.to_empty(device="cpu")
+    randomize_weights(model)
+
+    model.save_pretrained(output_dir, safe_serialization=True)
+    maybe_save_preprocessors(model_name_or_path, output_dir)
+
+
 def export_dummy_model(
     automodel_class,
     pretrained_config: PretrainedConfig,
@@ -1,13 +1,60 @@
 from dataclasses import dataclass, MISSING
+from typing import Any, Dict, Optional
 from logging import getLogger
 from abc import ABC
 
+from omegaconf import OmegaConf
+
 from optimum_benchmark.backends.base import Backend
 from optimum_benchmark.utils import set_seed
 
 
 LOGGER = getLogger("benchmark")
 
+# calibrated matmul peaks of the dtypes models are run in
+CALIBRATED_PEAKS = {
+    "float32": "matmul_fp32_gflops",
+    "float16": "matmul_fp16_gflops",
+    "bfloat16": "matmul_bf16_gflops",
+}
+# any of these backend options quantizes the model
+QUANTIZATION_OPTIONS = [
+    "quantization",
+    "auto_quantization",
+    "load_in_8bit",
+    "load_in_4bit",
+]
+
+
+def get_calibrated_peak(
+    calibration: Optional[Dict[str, Any]], backend_config: Any
+) -> Optional[float]:
+    """
+    Returns the calibrated matmul peak (GFLOP/s) of the dtype the backend runs
+    the model in, or None when it can't be known (e.g. quantized models).
+    """
+
+    if calibration is None:
+        return None
+
+    if any(backend_config.get(option) for option in QUANTIZATION_OPTIONS):
+        return None
+
+    if backend_config.get("amp_autocast"):
+        # the autocast dtype depends on the device when not set
+        dtype = backend_config.get("amp_dtype")
+    else:
+        dtype = backend_config.get("torch_dtype") or "float32"
+
+    if dtype not in CALIBRATED_PEAKS:
+        return None
+
+    return calibration.get(CALIBRATED_PEAKS[dtype])
+
+
+# benchmark resolvers
+OmegaConf.register_new_resolver("calibrated_peak", get_calibrated_peak)
+
 
 @dataclass
 class BenchmarkConfig(ABC):
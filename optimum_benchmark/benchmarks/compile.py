@@ -0,0 +1,263 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+from logging import getLogger
+import statistics
+import time
+
+import torch
+from pandas import DataFrame
+
+from optimum_benchmark.backends.base import Backend
+from optimum_benchmark.generators.input_generator import InputGenerator
+from optimum_benchmark.benchmarks.base import Benchmark, BenchmarkConfig
+from optimum_benchmark.tracing import TRACER
+from optimum_benchmark.trackers.latency import latency_tracker_class_for_backend
+from optimum_benchmark.trackers.load import significant_figures
+
+
+LOGGER = getLogger("compile")
+
+
+@dataclass
+class CompileConfig(BenchmarkConfig):
+    name: str = "compile"
+    _target_: str = "optimum_benchmark.benchmarks.compile.CompileBenchmark"
+
+    # the loaded model is compiled with every combination of modes and dynamic
+    # settings (null for automatic dynamic shapes), and compared to eager
+    modes: List[str] = field(
+        default_factory=lambda: ["default", "reduce-overhead", "max-autotune"]
+    )
+    dynamic: List[Optional[bool]] = field(default_factory=lambda: [False, True])
+    backend: str = "inductor"
+    fullgraph: bool = False
+
+    # benchmark options, per combination
+    warmup_runs: int = 10
+    benchmark_duration: int = 5
+
+    # sequence lengths of the inputs used to count recompilations on shape changes
+    recompile_sequence_lengths: List[int] = field(default_factory=lambda: [32, 64])
+
+    # input options
+    input_shapes: Dict = field(
+        default_factory=lambda: {
+            # used with all tasks
+            "batch_size": 2,
+            # used with text input tasks
+            "sequence_length": 16,
+            # padding of the ragged text batches (up to this ratio
+            # of the sequence length, growing along the batch)
+            "padding_ratio": 0.0,
+            # used with multiple choice tasks where input
+            # is of shape (batch_size, num_choices, sequence_length)
+            "num_choices": 1,
+            # used with audio input tasks
+            "feature_size": 80,
+            "nb_max_frames": 3000,
+            "audio_sequence_length": 16000,
+        }
+    )
+
+
+class CompileBenchmark(Benchmark):
+    def __init__(self):
+        # initialize compile results, one per combination
+        self.compile_results: List[Dict[str, Any]] = []
+        self.graph_breaks: List[Dict[str, Any]] = []
+
+    def configure(self, config: CompileConfig):
+        super().configure(config)
+
+        self.modes = config.modes
+        self.dynamic = config.dynamic
+        self.compile_backend = config.backend
+        self.fullgraph = config.fullgraph
+
+        self.warmup_runs = config.warmup_runs
+        self.benchmark_duration = config.benchmark_duration
+        self.recompile_sequence_lengths = config.recompile_sequence_lengths
+
+        self.input_shapes = config.input_shapes
+
+    def run(self, backend: Backend) -> None:
+        LOGGER.info("Running compile benchmark")
+
+        if backend.config.name != "pytorch":
+            raise ValueError(
+                "The compile benchmark is only supported by pytorch backend"
+            )
+        if backend.config.torch_compile:
+            raise ValueError("The compile benchmark compiles the model itself")
+        if backend.config.quantization is not None or backend.config.jit:
+            # the benchmark compiles the eager model, not the quantized or traced one
+            raise ValueError(
+                "The compile benchmark doesn't support quantization and jit"
+            )
+
+        self.input_shapes.update(backend.model_shapes)
+        self.forward_input = self.generate_input(backend, self.input_shapes)
+        self.recompile_inputs = [
+            self.generate_input(
+                backend, {**self.input_shapes, "sequence_length": sequence_length}
+            )
+            for sequence_length in self.recompile_sequence_lengths
+        ]
+
+        self.run_graph_breaks_explanation(backend)
+
+        LOGGER.info("\t+ Tracking eager forward pass latency")
+        self.compile_results.append(
+            {
+                "mode": "eager",
+                "dynamic": None,
+                **self.track_latency(backend, backend.pretrained_model),
+            }
+        )
+
+        for mode in self.modes:
+            for dynamic in self.dynamic:
+                self.run_compile_tracking(backend, mode, dynamic)
+
+        eager_latency = self.compile_results[0]["forward.latency(s)"]
+        for result in self.compile_results:
+            result["forward.speedup(%)"] = significant_figures(
+                (eager_latency / result["forward.latency(s)"] - 1) * 100
+            )
+
+    def generate_input(
+        self, backend: Backend, input_shapes: Dict[str, int]
+    ) -> Dict[str, Any]:
+        input_generator = InputGenerator(
+            task=backend.task,
+            input_shapes=input_shapes,
+            pretrained_config=backend.pretrained_config,
+        )
+        forward_input = input_generator.generate(mode="forward")
+
+        # TODO: handle this in backend using prepare_for_inference
+        for key, value in forward_input.items():
+            if key == "prompt":
+                continue
+            forward_input[key] = value.to(backend.device)
+
+        if backend.channels_last:
+            from optimum_benchmark.backends.pytorch import convert_to_channels_last
+
+            convert_to_channels_last(forward_input)
+
+        return forward_input
+
+    def run_graph_breaks_explanation(self, backend: Backend) -> None:
+        # graph breaks are found by dynamo, whatever the mode
+        LOGGER.info("\t+ Explaining graph breaks")
+        torch._dynamo.reset()
+        with TRACER.span("compile.explain"), backend.inference_context():
+            explanation = torch._dynamo.explain(backend.pretrained_model)(
+                **self.forward_input
+            )
+
+        self.graph_count = explanation.graph_count
+        self.graph_break_count = explanation.graph_break_count
+        for break_reason in explanation.break_reasons:
+            frame = break_reason.user_stack[-1] if break_reason.user_stack else None
+            self.graph_breaks.append(
+                {
+                    "reason": break_reason.reason,
+                    "file": frame.filename if frame is not None else None,
+                    "line": frame.lineno if frame is not None else None,
+                }
+            )
+
+        LOGGER.info(
+            f"\t+ {self.graph_count} graphs and {self.graph_break_count} graph breaks"
+        )
+        for graph_break in self.graph_breaks:
+            LOGGER.info(
+                f"\t\t+ {graph_break['reason']} "
+                f"({graph_break['file']}:{graph_break['line']})"
+            )
+
+    def run_compile_tracking(
+        self, backend: Backend, mode: str, dynamic: Optional[bool]
+    ) -> None:
+        from torch._dynamo.utils import counters
+
+        LOGGER.info(f"\t+ Compiling model with mode={mode} and dynamic={dynamic}")
+        # every combination starts from a clean state, without cached graphs
+        torch._dynamo.reset()
+        counters.clear()
+        compiled_model = torch.compile(
+            backend.pretrained_model,
+            mode=mode,
+            dynamic=dynamic,
+            backend=self.compile_backend,
+            fullgraph=self.fullgraph,
+        )
+
+        # compilation happens on the first call
+        with TRACER.span(
+            "compile.compile", mode=mode, dynamic=dynamic
+        ), backend.inference_context():
+            start = time.perf_counter()
+            _ = compiled_model(**self.forward_input)
+            compile_time = time.perf_counter() - start
+        graphs = counters["stats"]["unique_graphs"]
+
+        result = {
+            "mode": mode,
+            "dynamic": dynamic,
+            "compile_time(s)": significant_figures(compile_time),
+            "graphs": graphs,
+            "graph_breaks": self.graph_break_count,
+            **self.track_latency(backend, compiled_model),
+        }
+
+        # shape changes recompile the graphs, unless they're dynamic
+        recompile_time = 0.0
+        for recompile_input in self.recompile_inputs:
+            with TRACER.span(
+                "compile.recompile", mode=mode, dynamic=dynamic
+            ), backend.inference_context():
+                start = time.perf_counter()
+                _ = compiled_model(**recompile_input)
+                recompile_time += time.perf_counter() - start
+        result["recompiles"] = counters["stats"]["unique_graphs"] - graphs
+        result["recompile_time(s)"] = significant_figures(recompile_time)
+
+        LOGGER.info(
+            f"\t+ Compiled in {result['compile_time(s)']} (s), "
+            f"forward pass latency: {result['forward.latency(s)']:.2e} (s), "
+            f"recompiles: {result['recompiles']}"
+        )
+        self.compile_results.append(result)
+
+    def track_latency(self, backend: Backend, model: Any) -> Dict[str, float]:
+        with TRACER.span(
+            "forward.warmup", runs=self.warmup_runs
+        ), backend.inference_context():
+            for _ in range(self.warmup_runs):
+                _ = model(**self.forward_input)
+
+        latency_tracker = latency_tracker_class_for_backend[backend.config.name](
+            backend
+        )
+        latencies: List[float] = []
+        while sum(latencies) < self.benchmark_duration:
+            with TRACER.span("forward", iteration=len(latencies)):
+                with backend.inference_context(), latency_tracker.track():
+                    _ = model(**self.forward_input)
+            latencies = latency_tracker.get_latencies()
+
+        return {"forward.latency(s)": significant_figures(statistics.mean(latencies))}
+
+    def get_results_df(self) -> DataFrame:
+        return DataFrame(self.compile_results)
+
+    def save(self) -> None:
+        LOGGER.info("Saving compile results")
+        results_df = self.get_results_df()
+        results_df.to_csv("compile_results.csv")
+
+        if len(self.graph_breaks) > 0:
+            DataFrame(self.graph_breaks).to_csv("compile_graph_breaks.csv")
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List, Dict
+from typing import Any, List, Dict, Optional
 from logging import getLogger
 
 from pandas import DataFrame
@@ -8,6 +8,8 @@ import statistics
 from optimum_benchmark.backends.base import Backend
 from optimum_benchmark.generators.input_generator import InputGenerator
 from optimum_benchmark.benchmarks.base import Benchmark, BenchmarkConfig
+from optimum_benchmark.tracing import TRACER
+from optimum_benchmark.trackers.cpu import CPUUtilizationTracker
 from optimum_benchmark.trackers.memory import memory_tracker_class_for_backend
 from optimum_benchmark.trackers.latency import latency_tracker_class_for_backend
 
@@ -24,8 +26,18 @@ class InferenceConfig(BenchmarkConfig):
     memory: bool = False
     warmup_runs: int = 10
 
+    # efficiency options
+    flops: bool = False
+    # machine peak (GFLOP/s) used to compute efficiency, defaults to the
+    # host's calibrated matmul peak in the model's dtype when available
+    peak_gflops: Optional[float] = "${calibrated_peak:${environment.calibration}, ${backend}}"  # type: ignore
+
     benchmark_duration: int = 10  # TODO: deprecate this and use `benchmark.duration`
 
+    # asynchronous inference options, the number of forward passes kept in
+    # flight (0 for the backend's optimal number), only supported by openvino
+    async_requests: Optional[int] = None
+
     # input options
     input_shapes: Dict = field(
         default_factory=lambda: {
@@ -33,6 +45,9 @@ class InferenceConfig(BenchmarkConfig):
             "batch_size": 2,
             # used with text input tasks
             "sequence_length": 16,
+            # padding of the ragged text batches (up to this ratio
+            # of the sequence length, growing along the batch)
+            "padding_ratio": 0.0,
             # used with multiple choice tasks where input
             # is of shape (batch_size, num_choices, sequence_length)
             "num_choices": 1,
@@ -45,6 +60,9 @@ class InferenceConfig(BenchmarkConfig):
 
     # generation options
     new_tokens: int = 100  # TODO: deprecate this and use `benchamrk.generation_options`
+    # splits the generation latency in prefill and per token decoding latencies,
+    # with as many single token generations as generation passes
+    prefill: bool = False
 
     # diffusion options
     # TODO: add `benchmark.diffusion_options` for multiple images per prompt
@@ -56,17 +74,32 @@ class InferenceBenchmark(Benchmark):
         self.forward_peak_memory: int = 0
         self.forward_latencies: List[float] = []
         self.generate_latencies: List[float] = []
+        self.prefill_latencies: List[float] = []
+        self.forward_cpu_utilization: float = 0.0
+        self.async_latencies: List[float] = []
+        self.async_elapsed: float = 0.0
+        self.generate_cpu_utilization: float = 0.0
+        self.forward_flops: int = 0
+        self.generate_flops: int = 0
+        self.backend_metrics: Dict[str, Any] = {}
+        self.startup_latency: float = 0.0
+        self.compile_cache_warm: Optional[bool] = None
 
     def configure(self, config: InferenceConfig):
         super().configure(config)
 
         self.memory = config.memory
 
+        self.flops = config.flops
+        self.peak_gflops = config.peak_gflops
+
         self.warmup_runs = config.warmup_runs
         self.benchmark_duration = config.benchmark_duration
+        self.async_requests = config.async_requests
 
         self.input_shapes = config.input_shapes
         self.new_tokens = config.new_tokens
+        self.prefill = config.prefill
 
     def run(self, backend: Backend) -> None:
         LOGGER.info("Running inference benchmark")
@@ -80,17 +113,66 @@ class InferenceBenchmark(Benchmark):
             pretrained_config=backend.pretrained_config,
         )
 
+        # the first forward pass, which may include lazy compilation
+        self.run_startup_tracking(backend)
+
         if self.memory:
             # if requested, run memory tracking
             self.run_memory_tracking(backend)
 
+        if self.flops:
+            # if requested, run flops counting
+            self.run_flops_counting(backend)
+
         # run forward pass tracking
         self.run_forward_tracking(backend)
 
+        if self.async_requests is not None:
+            # if requested, run asynchronous forward passes tracking
+            self.run_async_forward_tracking(backend)
+
         if self.can_generate:
             # if possible, run generation pass tracking
             self.run_generate_tracking(backend)
 
+        # e.g. artifacts cache hits
+        self.backend_metrics = backend.metrics
+
+    def run_startup_tracking(self, backend: Backend) -> None:
+        startup_input = self.input_generator.generate(
+            mode="forward",
+        )
+
+        # TODO: handle this in backend using prepare_for_inference
+        for key, value in startup_input.items():
+            if key == "prompt":
+                continue
+            startup_input[key] = value.to(backend.device)
+
+        LOGGER.info("\t+ Tracking startup latency")
+        latency_tracker = latency_tracker_class_for_backend[backend.config.name](
+            backend
+        )
+        with TRACER.span("forward.startup"):
+            with latency_tracker.track():
+                # for backends that require compilation with static shapes
+                backend.prepare_for_inference(input_shapes=self.input_shapes)
+                _ = backend.forward(startup_input)
+
+        # from the beginning of the backend configuration to the first output
+        self.startup_latency = significant_figures(
+            backend.configure_latency
+            + latency_tracker.get_latencies()[0]
+            - backend.excluded_startup_latency
+        )
+        self.compile_cache_warm = backend.is_compile_cache_warm()
+
+        LOGGER.info(f"\t+ Startup latency: {self.startup_latency:.2e} (s)")
+        if self.compile_cache_warm is not None:
+            LOGGER.info(
+                f"\t+ Compile cache was {'warm' if self.compile_cache_warm else 'cold'}"
+            )
+
     def run_memory_tracking(self, backend: Backend) -> None:
         memory_input = self.input_generator.generate(
             mode="forward",
@@ -107,12 +189,33 @@ class InferenceBenchmark(Benchmark):
 
         LOGGER.info("\t+ Tracking forward pass peak memory")
         memory_tracker = memory_tracker_class_for_backend[backend.config.name](backend)
-        with memory_tracker.track(interval=self.benchmark_duration // 100):
-            _ = backend.forward(memory_input)
+        with TRACER.span("forward.memory"):
+            with memory_tracker.track(interval=self.benchmark_duration // 100):
+                _ = backend.forward(memory_input)
 
         self.forward_peak_memory = memory_tracker.get_peak_memory()
         LOGGER.info(f"\t+ Forward pass peak memory: {self.forward_peak_memory} (MB)")
 
+    def run_flops_counting(self, backend: Backend) -> None:
+        from optimum_benchmark.trackers.flops import FLOPsCounter
+
+        flops_input = self.input_generator.generate(
+            mode="forward",
+        )
+
+        LOGGER.info("\t+ Counting forward pass FLOPs")
+        with TRACER.span("flops.count"):
+            flops_counter = FLOPsCounter(backend)
+            self.forward_flops = flops_counter.count_forward_flops(flops_input)
+        LOGGER.info(f"\t+ Forward pass FLOPs: {self.forward_flops:.2e}")
+
+        if self.can_generate:
+            LOGGER.info("\t+ Counting generation pass FLOPs")
+            self.generate_flops = flops_counter.count_generate_flops(
+                flops_input, new_tokens=self.new_tokens
+            )
+            LOGGER.info(f"\t+ Generation pass FLOPs: {self.generate_flops:.2e}")
+
     def run_forward_tracking(self, backend: Backend) -> None:
         forward_input = self.input_generator.generate(
             mode="forward",
@@ -128,22 +231,51 @@ class InferenceBenchmark(Benchmark):
         backend.prepare_for_inference(input_shapes=self.input_shapes)
 
         LOGGER.info("\t+ Warming up the forward pass")
-        for _ in range(self.warmup_runs):
-            _ = backend.forward(forward_input)
+        with TRACER.span("forward.warmup", runs=self.warmup_runs):
+            for _ in range(self.warmup_runs):
+                _ = backend.forward(forward_input)
 
         LOGGER.info("\t+ Tracking forward pass latency and throughput")
         latency_tracker = latency_tracker_class_for_backend[backend.config.name](
             backend
         )
+        cpu_tracker = CPUUtilizationTracker()
         while sum(self.forward_latencies) < self.benchmark_duration:
-            with latency_tracker.track():
-                _ = backend.forward(forward_input)
+            with TRACER.span("forward", iteration=len(self.forward_latencies)):
+                with cpu_tracker.track(), latency_tracker.track():
+                    _ = backend.forward(forward_input)
             self.forward_latencies = latency_tracker.get_latencies()
+        self.forward_cpu_utilization = significant_figures(
+            cpu_tracker.get_cpu_utilization()
+        )
 
         LOGGER.info(f"\t+ Forward pass latency: {self.forward_latency:.2e} (s)")
         LOGGER.info(
             f"\t+ Forward pass throughput: {self.forward_throughput:.2f} (samples/s)"
         )
+        LOGGER.info(
+            f"\t+ Forward pass CPU utilization: {self.forward_cpu_utilization} (%)"
+        )
+
+    def run_async_forward_tracking(self, backend: Backend) -> None:
+        async_input = self.input_generator.generate(
+            mode="forward",
+        )
+
+        LOGGER.info("\t+ Tracking asynchronous forward passes latency and throughput")
+        with TRACER.span("forward.async", requests=self.async_requests):
+            self.async_latencies, self.async_elapsed = backend.forward_async(
+                async_input,
+                requests=self.async_requests,
+                duration=self.benchmark_duration,
+            )
+
+        LOGGER.info(
+            f"\t+ Asynchronous forward pass latency: {self.async_latency:.2e} (s)"
+        )
+        LOGGER.info(
+            f"\t+ Asynchronous forward pass throughput: {self.async_throughput:.2f} (samples/s)"
+        )
 
     def run_generate_tracking(self, backend: Backend) -> None:
         generate_input = self.input_generator.generate(
@@ -157,38 +289,76 @@ class InferenceBenchmark(Benchmark):
             generate_input[key] = value.to(backend.device)
 
         LOGGER.info("\t+ Warming up the generation pass")
-        _ = backend.generate(
-            input=generate_input,
-            max_new_tokens=self.new_tokens,
-            min_new_tokens=self.new_tokens,
-            do_sample=False,
-            use_cache=True,
-            pad_token_id=0,
-            num_beams=1,
-        )
+        with TRACER.span("generate.warmup", runs=1):
+            _ = backend.generate(
+                input=generate_input,
+                max_new_tokens=self.new_tokens,
+                min_new_tokens=self.new_tokens,
+                do_sample=False,
+                use_cache=True,
+                pad_token_id=0,
+                num_beams=1,
+            )
 
         LOGGER.info("\t+ Tracking generation latency and throughput")
         latency_tracker = latency_tracker_class_for_backend[backend.config.name](
             backend
         )
+        cpu_tracker = CPUUtilizationTracker()
         while sum(self.generate_latencies) < self.benchmark_duration:
-            with latency_tracker.track():
-                _ = backend.generate(
-                    generate_input,
-                    max_new_tokens=self.new_tokens,
-                    min_new_tokens=self.new_tokens,
-                    do_sample=False,
-                    use_cache=True,
-                    pad_token_id=0,
-                    num_beams=1,
-                )
+            with TRACER.span("generate", iteration=len(self.generate_latencies)):
+                with cpu_tracker.track(), latency_tracker.track():
+                    _ = backend.generate(
+                        generate_input,
+                        max_new_tokens=self.new_tokens,
+                        min_new_tokens=self.new_tokens,
+                        do_sample=False,
+                        use_cache=True,
+                        pad_token_id=0,
+                        num_beams=1,
+                    )
             self.generate_latencies = latency_tracker.get_latencies()
+        self.generate_cpu_utilization = significant_figures(
+            cpu_tracker.get_cpu_utilization()
+        )
 
         LOGGER.info(f"\t+ Generation pass latency: {self.generate_latency:.2e} (s)")
+        if self.prefill:
+            self.run_prefill_tracking(backend, generate_input)
 
         LOGGER.info(
             f"\t+ Generation pass throughput: {self.generate_throughput:.2f} (tokens/s)"
         )
+        LOGGER.info(
+            f"\t+ Generation pass CPU utilization: {self.generate_cpu_utilization} (%)"
+        )
+
+    def run_prefill_tracking(self, backend: Backend, generate_input: Dict) -> None:
+        # the prefill is a generation of a single token, what remains of the
+        # generation latency is the decoding of the other tokens
+        LOGGER.info("\t+ Tracking prefill latency")
+        latency_tracker = latency_tracker_class_for_backend[backend.config.name](
+            backend
+        )
+        with TRACER.span("generate.prefill", runs=len(self.generate_latencies)):
+            for _ in range(len(self.generate_latencies)):
+                with latency_tracker.track():
+                    _ = backend.generate(
+                        generate_input,
+                        max_new_tokens=1,
+                        min_new_tokens=1,
+                        do_sample=False,
+                        use_cache=True,
+                        pad_token_id=0,
+                        num_beams=1,
+                    )
+        self.prefill_latencies = latency_tracker.get_latencies()
+
+        LOGGER.info(f"\t+ Prefill latency: {self.prefill_latency:.2e} (s)")
+        if self.new_tokens > 1:
+            LOGGER.info(
+                f"\t+ Per token decoding latency: {self.per_token_latency:.2e} (s)"
+            )
 
     # Metrics
     @property
@@ -199,28 +369,106 @@ class InferenceBenchmark(Benchmark):
     def forward_throughput(self) -> float:
         return significant_figures(self.input_shapes.batch_size / self.forward_latency)
 
+    @property
+    def async_latency(self) -> float:
+        return significant_figures(statistics.mean(self.async_latencies))
+
+    @property
+    def async_throughput(self) -> float:
+        # requests are executed concurrently, throughput isn't 1 / latency
+        return significant_figures(
+            len(self.async_latencies)
+            * self.input_shapes.batch_size
+            / self.async_elapsed
+        )
+
     @property
     def generate_latency(self) -> float:
         return significant_figures(statistics.mean(self.generate_latencies))
 
+    @property
+    def prefill_latency(self) -> float:
+        return significant_figures(statistics.mean(self.prefill_latencies))
+
+    @property
+    def per_token_latency(self) -> float:
+        return significant_figures(
+            (self.generate_latency - self.prefill_latency) / (self.new_tokens - 1)
+        )
+
     @property
     def generate_throughput(self) -> float:
         return significant_figures(
             self.new_tokens * self.input_shapes.batch_size / self.generate_latency
         )
 
+    @property
+    def forward_achieved_gflops(self) -> float:
+        return significant_figures(self.forward_flops * 1e-9 / self.forward_latency)
+
+    @property
+    def generate_achieved_gflops(self) -> float:
+        return significant_figures(self.generate_flops * 1e-9 / self.generate_latency)
+
     def get_results_df(self) -> DataFrame:
         results_dict = dict()
 
         if self.memory:
             results_dict["forward.peak_memory(MB)"] = self.forward_peak_memory
 
+        # startups with a warm and a cold compile cache aren't comparable
+        if self.compile_cache_warm is None:
+            results_dict["forward.startup_latency(s)"] = self.startup_latency
+        elif self.compile_cache_warm:
+            results_dict["forward.warm_startup_latency(s)"] = self.startup_latency
+        else:
+            results_dict["forward.cold_startup_latency(s)"] = self.startup_latency
+
         results_dict["forward.latency(s)"] = self.forward_latency
         results_dict["forward.throughput(samples/s)"] = self.forward_throughput
+        results_dict["forward.cpu_utilization(%)"] = self.forward_cpu_utilization
+
+        if self.async_requests is not None:
+            results_dict["forward.async_latency(s)"] = self.async_latency
+            results_dict[
+                "forward.async_throughput(samples/s)"
+            ] = self.async_throughput
+
+        if self.flops:
+            results_dict["forward.flops(GFLOP)"] = significant_figures(
+                self.forward_flops * 1e-9
+            )
+            results_dict["forward.achieved(GFLOP/s)"] = self.forward_achieved_gflops
+            if self.peak_gflops is not None:
+                results_dict["forward.efficiency(%)"] = efficiency(
+                    self.forward_achieved_gflops, self.peak_gflops
+                )
 
         if self.can_generate:
             results_dict["generate.latency(s)"] = self.generate_latency
             results_dict["generate.throughput(tokens/s)"] = self.generate_throughput
+            results_dict["generate.cpu_utilization(%)"] = self.generate_cpu_utilization
+            if self.prefill:
+                results_dict["generate.prefill_latency(s)"] = self.prefill_latency
+                if self.new_tokens > 1:
+                    results_dict["generate.per_token_latency(s)"] = (
+                        self.per_token_latency
+                    )
+
+            if self.flops:
+                results_dict["generate.flops(GFLOP)"] = significant_figures(
+                    self.generate_flops * 1e-9
+                )
+                results_dict[
+                    "generate.achieved(GFLOP/s)"
+                ] = self.generate_achieved_gflops
+                if self.peak_gflops is not None:
+                    results_dict["generate.efficiency(%)"] = efficiency(
+                        self.generate_achieved_gflops, self.peak_gflops
+                    )
+
+        for key, value in self.backend_metrics.items():
+            results_dict[f"backend.{key}"] = value
 
         return DataFrame(results_dict, index=[0])
 
@@ -232,3 +480,7 @@ class InferenceBenchmark(Benchmark):
 
 def significant_figures(x):
     return float(f"{x:.3g}")
+
+
+def efficiency(achieved_gflops: float, peak_gflops: float) -> float:
+    return significant_figures(achieved_gflops / peak_gflops * 100)
@@ -0,0 +1,237 @@
+from dataclasses import dataclass, field
+from typing import Any, List, Dict, Optional, Tuple
+from logging import getLogger
+
+from pandas import DataFrame
+
+from optimum_benchmark.backends.base import Backend
+from optimum_benchmark.generators.input_generator import InputGenerator
+from optimum_benchmark.benchmarks.base import Benchmark, BenchmarkConfig
+from optimum_benchmark.profilers.module_profiler import ModuleProfilingWrapper
+from optimum_benchmark.tracing import TRACER
+
+
+LOGGER = getLogger("profiling")
+
+PERCENTILES = [50, 90, 99]
+
+
+@dataclass
+class ProfilingConfig(BenchmarkConfig):
+    name: str = "profiling"
+    _target_: str = "optimum_benchmark.benchmarks.profiling.ProfilingBenchmark"
+
+    # benchmark options
+    warmup_runs: int = 10
+    profiling_runs: int = 10
+    # number of hottest nodes and op types to log
+    top_n: int = 10
+
+    # generation options, profiling generate instead of forward passes
+    # is only supported by profilers that don't trace the model (hooks)
+    generate: bool = False
+    new_tokens: int = 16
+
+    # input options
+    input_shapes: Dict = field(
+        default_factory=lambda: {
+            # used with all tasks
+            "batch_size": 2,
+            # used with text input tasks
+            "sequence_length": 16,
+            # padding of the ragged text batches (up to this ratio
+            # of the sequence length, growing along the batch)
+            "padding_ratio": 0.0,
+            # used with multiple choice tasks where input
+            # is of shape (batch_size, num_choices, sequence_length)
+            "num_choices": 1,
+            # used with audio input tasks
+            "feature_size": 80,
+            "nb_max_frames": 3000,
+            "audio_sequence_length": 16000,
+        }
+    )
+
+
+class ProfilingBenchmark(Benchmark):
+    def __init__(self):
+        # initialize profiling results
+        self.profiling_records: List[Tuple[int, str, str, float]] = []
+        self.details_df: Optional[DataFrame] = None
+
+    def configure(self, config: ProfilingConfig):
+        super().configure(config)
+
+        self.warmup_runs = config.warmup_runs
+        self.profiling_runs = config.profiling_runs
+        self.top_n = config.top_n
+
+        self.generate = config.generate
+        self.new_tokens = config.new_tokens
+
+        self.input_shapes = config.input_shapes
+
+    def run(self, backend: Backend) -> None:
+        LOGGER.info("Running profiling benchmark")
+
+        self.input_shapes.update(backend.model_shapes)
+
+        self.input_generator = InputGenerator(
+            task=backend.task,
+            input_shapes=self.input_shapes,
+            pretrained_config=backend.pretrained_config,
+        )
+
+        profiling_input = self.input_generator.generate(
+            mode="forward",
+        )
+
+        # TODO: handle this in backend using prepare_for_inference
+        for key, value in profiling_input.items():
+            if key == "prompt":
+                continue
+            profiling_input[key] = value.to(backend.device)
+
+        # for backends that require compilation with static shapes
+        backend.prepare_for_inference(input_shapes=self.input_shapes)
+
+        # for backends that wrap the model inside a profiler
+        backend.prepare_for_profiling(
+            input_names=list(profiling_input.keys()),
+            input_shapes=self.input_shapes,
+        )
+        if self.generate and not isinstance(
+            backend.pretrained_model, ModuleProfilingWrapper
+        ):
+            raise ValueError(
+                "generate profiling requires backend.profiler=hooks (pytorch backend)"
+            )
+
+        mode = "generate" if self.generate else "forward"
+
+        LOGGER.info(f"\t+ Warming up the {mode} pass")
+        with TRACER.span(f"{mode}.warmup", runs=self.warmup_runs):
+            for _ in range(self.warmup_runs):
+                _ = self.run_pass(backend, profiling_input)
+
+        LOGGER.info(f"\t+ Profiling {self.profiling_runs} {mode} passes")
+        for iteration in range(self.profiling_runs):
+            with TRACER.span(mode, iteration=iteration):
+                _ = self.run_pass(backend, profiling_input)
+
+        # records of the warmup runs are discarded
+        self.profiling_records = [
+            record
+            for record in backend.pretrained_model.get_profiling_records()
+            if record[0] >= self.warmup_runs
+        ]
+
+        LOGGER.info(f"\t+ Collected {len(self.profiling_records)} profiling records")
+
+        # some profilers collect backend-specific details (e.g. kernels status)
+        if hasattr(backend.pretrained_model, "get_profiling_details"):
+            details_df = backend.pretrained_model.get_profiling_details()
+            self.details_df = details_df[details_df["run"] >= self.warmup_runs]
+        else:
+            self.details_df = None
+
+    def run_pass(self, backend: Backend, profiling_input: Dict) -> Any:
+        if self.generate:
+            return backend.generate(
+                profiling_input,
+                max_new_tokens=self.new_tokens,
+                min_new_tokens=self.new_tokens,
+                do_sample=False,
+                use_cache=True,
+                pad_token_id=0,
+                num_beams=1,
+            )
+
+        return backend.forward(profiling_input)
+
+    def get_records_df(self) -> DataFrame:
+        records_df = DataFrame(
+            self.profiling_records, columns=["run", "name", "op", "runtime(s)"]
+        )
+
+        return records_df
+
+    def get_nodes_df(self) -> DataFrame:
+        records_df = self.get_records_df()
+
+        # a node can be executed more than once in a single run
+        nodes_df = records_df.groupby(["run", "name", "op"], sort=False).sum()
+        nodes_df = aggregate_runtimes(nodes_df, by=["name", "op"])
+
+        return nodes_df
+
+    def get_ops_df(self) -> DataFrame:
+        records_df = self.get_records_df().drop(columns=["name"])
+
+        ops_df = records_df.groupby(["run", "op"], sort=False).sum()
+        ops_df = aggregate_runtimes(ops_df, by=["op"])
+
+        return ops_df
+
+    def get_details_df(self) -> DataFrame:
+        # details are averaged over runs for each unique set of attributes
+        details_df = self.details_df.drop(columns=["run"])
+        attributes = list(details_df.select_dtypes(exclude="number").columns)
+        details_df = details_df.groupby(attributes, sort=False)
+
+        aggregated_df = details_df.mean()
+        aggregated_df.insert(0, "count", details_df.size())
+
+        return aggregated_df
+
+    def save(self) -> None:
+        LOGGER.info("Saving profiling results")
+        nodes_df = self.get_nodes_df()
+        nodes_df.to_csv("profiling_results.csv")
+
+        ops_df = self.get_ops_df()
+        ops_df.to_csv("profiling_ops_results.csv")
+
+        if self.details_df is not None:
+            details_df = self.get_details_df()
+            details_df.to_csv("profiling_details_results.csv")
+
+        LOGGER.info("\t+ Top nodes by mean runtime per pass:")
+        for (name, op), row in nodes_df.head(self.top_n).iterrows():
+            LOGGER.info(
+                f"\t\t+ {name} ({op}): {row['mean(s)']:.2e} (s) "
+                f"({row['share(%)']:.1f}%)"
+            )
+
+        LOGGER.info("\t+ Top op types by mean runtime per pass:")
+        for op, row in ops_df.head(self.top_n).iterrows():
+            LOGGER.info(
+                f"\t\t+ {op}: {row['mean(s)']:.2e} (s) ({row['share(%)']:.1f}%)"
+            )
+
+
+def aggregate_runtimes(runs_df: DataFrame, by: List[str]) -> DataFrame:
+    """
+    Aggregates the per-run runtimes of `runs_df` (indexed by run and `by`)
+    into mean, standard deviation and percentiles across runs.
+    """
+
+    runtimes = runs_df["runtime(s)"].groupby(level=by, sort=False)
+
+    aggregated_df = DataFrame(
+        {
+            "count": runtimes.count(),
+            "mean(s)": runtimes.mean(),
+            "std(s)": runtimes.std(ddof=0),
+            **{
+                f"p{percentile}(s)": runtimes.quantile(percentile / 100)
+                for percentile in PERCENTILES
+            },
+        }
+    )
+    aggregated_df["share(%)"] = (
+        aggregated_df["mean(s)"] / aggregated_df["mean(s)"].sum() * 100
+    )
+    aggregated_df.sort_values(by="mean(s)", ascending=False, inplace=True)
+
+    return aggregated_df
@@ -154,6 +154,12 @@ class TrainingConfig(BenchmarkConfig):
         }
     )
 
+    # efficiency options
+    flops: bool = False
+    # machine peak (GFLOP/s) used to compute efficiency, defaults to the
+    # host's calibrated matmul peak in the model's dtype when available
+    peak_gflops: Optional[float] = "${calibrated_peak:${environment.calibration}, ${backend}}"  # type: ignore
+
     # PyTorch-specific configuration.
     use_ddp: bool = False
     ddp_config: Optional[Dict] = None
@@ -196,6 +202,9 @@ class TrainingBenchmark(Benchmark):
         self.dataset_shapes = config.dataset_shapes
         self.training_arguments = config.training_arguments
 
+        self.flops = config.flops
+        self.peak_gflops = config.peak_gflops
+
     def run(self, backend: "Backend") -> None:
         LOGGER.info("Running training benchmark")
         model_shapes = backend.model_shapes
@@ -234,6 +243,41 @@ class TrainingBenchmark(Benchmark):
                 "train_runtime": training_output.metrics["train_runtime"],
             }
 
+        if self.flops:
+            # if requested, run flops counting
+            self.run_flops_counting(backend, training_dataset)
+
+        # e.g. artifacts cache hits
+        for key, value in backend.metrics.items():
+            self.training_metrics[f"backend.{key}"] = value
+
+    def run_flops_counting(self, backend: "Backend", training_dataset) -> None:
+        from optimum_benchmark.trackers.flops import FLOPsCounter
+
+        LOGGER.info("\t+ Counting training step FLOPs per sample")
+        flops_counter = FLOPsCounter(backend)
+        # a batch of one sample, forward and backward passes
+        flops_per_sample = flops_counter.count_training_flops(training_dataset[:1])
+        LOGGER.info(f"\t+ Training FLOPs per sample: {flops_per_sample:.2e}")
+
+        # pytorch and trainer-based backends report throughput differently
+        samples_per_second = self.training_metrics.get(
+            "train_samples_per_second",
+            self.training_metrics.get("training_throughput"),
+        )
+        achieved_gflops = flops_per_sample * 1e-9 * samples_per_second
+
+        self.training_metrics["training.flops_per_sample(GFLOP)"] = float(
+            f"{flops_per_sample * 1e-9:.3g}"
+        )
+        self.training_metrics["training.achieved(GFLOP/s)"] = float(
+            f"{achieved_gflops:.3g}"
+        )
+        if self.peak_gflops is not None:
+            self.training_metrics["training.efficiency(%)"] = float(
+                f"{achieved_gflops / self.peak_gflops * 100:.3g}"
+            )
+
     def get_results_df(self) -> DataFrame:
         return DataFrame(self.training_metrics, index=[0])
 
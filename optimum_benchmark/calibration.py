@@ -0,0 +1,185 @@
+from typing import Any, Callable, Dict, Optional
+from logging import getLogger
+from pathlib import Path
+import platform
+import json
+import time
+import os
+
+import psutil
+import torch
+
+
+LOGGER = getLogger("calibration")
+
+CALIBRATION_CACHE_DIR = Path(
+    os.environ.get(
+        "OPTIMUM_BENCHMARK_CALIBRATION_CACHE",
+        os.path.expanduser("~/.cache/optimum_benchmark/calibration"),
+    )
+)
+
+# time budget of each microbenchmark, we keep the best measurement
+CALIBRATION_DURATION = 0.5
+CALIBRATION_MIN_RUNS = 3
+
+# large enough to be compute bound, small enough to be quick on any cpu
+MATMUL_SIZE = {"cpu": 1024, "cuda": 4096}
+# large enough not to fit in the last level cache (128MB per fp32 array)
+STREAM_SIZE = 2**25
+
+
+def get_calibration(device: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the calibration of this host for the given device, measuring it
+    only once per host, device type and torch version, or None for device
+    types that can't be calibrated.
+    """
+
+    device = torch.device(device)
+    if device.type not in MATMUL_SIZE:
+        LOGGER.warning(f"Machine calibration is not supported on {device.type}")
+        return None
+
+    cache_file = CALIBRATION_CACHE_DIR / (
+        f"{platform.node()}_{device.type}_torch-{torch.__version__}"
+        f"_threads-{torch.get_num_threads()}.json"
+    )
+
+    if cache_file.exists():
+        LOGGER.info(f"Loading cached machine calibration from {cache_file}")
+        with open(cache_file) as file_obj:
+            calibration = json.load(file_obj)
+    else:
+        LOGGER.info(f"Calibrating machine capabilities on {device.type}")
+        calibration = run_calibration(device)
+        # writing in a temporary file first as several jobs can calibrate at once
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = cache_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_file, "w") as file_obj:
+            json.dump(calibration, file_obj, indent=4)
+        os.replace(tmp_file, cache_file)
+
+    # frequencies are not cached since they change with load and power states
+    calibration.update(get_cpu_frequencies())
+
+    return calibration
+
+
+def run_calibration(device: torch.device) -> Dict[str, Any]:
+    calibration = {}
+
+    for dtype_name, dtype in [
+        ("fp32", torch.float32),
+        ("fp16", torch.float16),
+        ("bf16", torch.bfloat16),
+    ]:
+        if dtype == torch.float16 and device.type == "cpu":
+            # fp16 matmuls are emulated on most cpus
+            continue
+        if dtype == torch.bfloat16 and device.type == "cuda":
+            if not torch.cuda.is_bf16_supported():
+                continue
+
+        gflops = measure_matmul_gflops(device, dtype)
+        LOGGER.info(f"\t+ Peak {dtype_name} matmul: {gflops:.2f} (GFLOP/s)")
+        calibration[f"matmul_{dtype_name}_gflops"] = gflops
+
+    gops = measure_int8_matmul_gops(device)
+    if gops is not None:
+        LOGGER.info(f"\t+ Peak int8 matmul: {gops:.2f} (GOP/s)")
+        calibration["matmul_int8_gops"] = gops
+
+    copy_gbps, triad_gbps = measure_memory_bandwidth(device)
+    LOGGER.info(f"\t+ Memory bandwidth (copy): {copy_gbps:.2f} (GB/s)")
+    LOGGER.info(f"\t+ Memory bandwidth (triad): {triad_gbps:.2f} (GB/s)")
+    calibration["memory_copy_gbps"] = copy_gbps
+    calibration["memory_triad_gbps"] = triad_gbps
+
+    return calibration
+
+
+def measure_matmul_gflops(device: torch.device, dtype: torch.dtype) -> float:
+    size = MATMUL_SIZE[device.type]
+    a = torch.randn(size, size, device=device).to(dtype)
+    b = torch.randn(size, size, device=device).to(dtype)
+    out = torch.empty(size, size, device=device, dtype=dtype)
+
+    latency = best_latency(lambda: torch.matmul(a, b, out=out), device)
+
+    return significant_figures(2 * size**3 / latency * 1e-9)
+
+
+def measure_int8_matmul_gops(device: torch.device) -> Optional[float]:
+    size = MATMUL_SIZE[device.type]
+    a = torch.randint(-128, 127, (size, size), dtype=torch.int8, device=device)
+    b = torch.randint(-128, 127, (size, size), dtype=torch.int8, device=device)
+
+    try:
+        latency = best_latency(lambda: torch._int_mm(a, b), device)
+    except (AttributeError, NotImplementedError, RuntimeError):
+        LOGGER.info(f"\t+ Int8 matmul is not supported on {device.type}")
+        return None
+
+    return significant_figures(2 * size**3 / latency * 1e-9)
+
+
+def measure_memory_bandwidth(device: torch.device):
+    # STREAM-style kernels: copy (a = b) and triad (a = b + s * c)
+    a = torch.empty(STREAM_SIZE, dtype=torch.float32, device=device)
+    b = torch.rand(STREAM_SIZE, dtype=torch.float32, device=device)
+    c = torch.rand(STREAM_SIZE, dtype=torch.float32, device=device)
+    array_bytes = STREAM_SIZE * a.element_size()
+
+    copy_latency = best_latency(lambda: a.copy_(b), device)
+    triad_latency = best_latency(lambda: torch.add(b, c, alpha=3.0, out=a), device)
+
+    copy_gbps = significant_figures(2 * array_bytes / copy_latency * 1e-9)
+    triad_gbps = significant_figures(3 * array_bytes / triad_latency * 1e-9)
+
+    return copy_gbps, triad_gbps
+
+
+def get_cpu_frequencies() -> Dict[str, Any]:
+    frequencies = {}
+
+    try:
+        per_core = psutil.cpu_freq(percpu=True)
+    except (AttributeError, NotImplementedError, FileNotFoundError):
+        per_core = []
+
+    if len(per_core) > 0:
+        frequencies["cpu_freq_mhz"] = [round(freq.current) for freq in per_core]
+        # not exposed on some virtual machines
+        max_freq = max(freq.max for freq in per_core)
+        if max_freq > 0:
+            frequencies["cpu_max_freq_mhz"] = max_freq
+
+    return frequencies
+
+
+def best_latency(function: Callable, device: torch.device) -> float:
+    # first call is a warmup
+    function()
+    synchronize(device)
+
+    latencies = []
+    while (
+        len(latencies) < CALIBRATION_MIN_RUNS or sum(latencies) < CALIBRATION_DURATION
+    ):
+        start = time.perf_counter_ns()
+        function()
+        synchronize(device)
+        end = time.perf_counter_ns()
+        latencies.append((end - start) / 1e9)
+
+    return min(latencies)
+
+
+def synchronize(device: torch.device) -> None:
+    if device.type == "cuda":
+        torch.cuda.synchronize(device=device)
+
+
+def significant_figures(x):
+    return float(f"{x:.3g}")
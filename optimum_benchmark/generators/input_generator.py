@@ -12,6 +12,7 @@ from optimum_benchmark.generators.model_type_generator import (
 from optimum_benchmark.generators.task_generator import (
     TASKS_TO_GENERATORS,
     TaskGenerator,
+    ragged_attention_mask,
 )
 
 
@@ -29,6 +30,8 @@ class InputGenerator:
         # for model_type_generator
         pretrained_config: Optional["PretrainedConfig"] = None,
     ):
+        self.input_shapes = input_shapes
+
         if pretrained_config is not None:
             model_type = pretrained_config.model_type
             if ModelTypeGenerator.check_model_type_support(model_type):
@@ -62,6 +65,13 @@ class InputGenerator:
         elif self.task_generator is not None:
             dummy_input = self.task_generator.generate()
 
+        # ragged batches, e.g. to compare the handling of padding tokens
+        padding_ratio = self.input_shapes.get("padding_ratio", 0)
+        if padding_ratio > 0 and "attention_mask" in dummy_input:
+            dummy_input["attention_mask"] = ragged_attention_mask(
+                dummy_input["attention_mask"], padding_ratio
+            )
+
         if mode == "generate":
             if "input_ids" in dummy_input:
                 # text input
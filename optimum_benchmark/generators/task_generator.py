@@ -57,6 +57,25 @@ class TextGenerator(TaskGenerator):
         )
 
 
+def ragged_attention_mask(
+    attention_mask: torch.Tensor, padding_ratio: float
+) -> torch.Tensor:
+    """
+    Right pads the sequences of the batch, with a padding growing linearly from
+    none for the first sequence to `padding_ratio` of the sequence length for
+    the last one (at least one token is kept).
+    """
+
+    batch_size, sequence_length = attention_mask.shape[0], attention_mask.shape[-1]
+    max_padding = min(int(padding_ratio * sequence_length), sequence_length - 1)
+    paddings = torch.linspace(0, max_padding, batch_size).round().long()
+
+    lengths = (sequence_length - paddings).view(-1, *[1] * (attention_mask.dim() - 1))
+    ragged_mask = torch.arange(sequence_length) < lengths
+
+    return ragged_mask.to(attention_mask.dtype).expand_as(attention_mask).contiguous()
+
+
 class ImageGenerator(TaskGenerator):
     def pixel_values(self):
         return self.generate_random_floats(
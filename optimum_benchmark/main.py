@@ -1,4 +1,5 @@
 import os
+import time
 import platform
 from typing import Type, Dict
 from logging import getLogger
@@ -24,9 +25,18 @@ from optimum_benchmark.backends.base import Backend
 from optimum_benchmark.benchmarks.base import Benchmark
 from optimum_benchmark.backends.base import Backend, BackendConfig
 from optimum_benchmark.benchmarks.training import TrainingConfig
+from optimum_benchmark.benchmarks.profiling import ProfilingConfig
 from optimum_benchmark.benchmarks.inference import InferenceConfig
+from optimum_benchmark.benchmarks.compile import CompileConfig
 from optimum_benchmark.benchmarks.base import Benchmark, BenchmarkConfig
-from .utils import remap_to_correct_metadata, get_cpu, get_cpu_ram_mb
+from .utils import (
+    remap_to_correct_metadata,
+    get_cpu,
+    get_cpu_ram_mb,
+    get_cpu_isa_features,
+)
+from .calibration import get_calibration
+from .tracing import TRACER
 
 LOGGER = getLogger("main")
 
@@ -39,6 +49,12 @@ OmegaConf.register_new_resolver(
         revision=revision,
     ),
 )
+# resolved lazily, and only measured once per host
+OmegaConf.register_new_resolver(
+    "calibration",
+    lambda device, calibrate: get_calibration(device) if calibrate else None,
+    use_cache=True,
+)
 
 
 @dataclass
@@ -57,6 +73,10 @@ class ExperimentConfig:
     device: str = MISSING
     # Task name (text-classification, image-classification, ...)
     task: str = "${infer_task:${model}, ${hub_kwargs.revision}}"
+    # Save a Chrome/Perfetto trace of the experiment's phases (experiment_trace.json)
+    trace: bool = False
+    # Calibrate the machine's peak matmul throughputs and memory bandwidth
+    calibrate: bool = False
 
     # ADDITIONAL MODEL CONFIGURATION: Model revision, use_auth_token, trust_remote_code
     hub_kwargs: Dict = field(
@@ -80,6 +100,10 @@ class ExperimentConfig:
             "cpu": get_cpu(),
             "cpu_count": os.cpu_count(),
             "cpu_ram_mb": get_cpu_ram_mb(),
+            "cpu_isa": get_cpu_isa_features(),
+            # peak matmul throughputs, memory bandwidth and cpu frequencies
+            # only measured with calibrate=true (null otherwise)
+            "calibration": "${calibration:${device}, ${calibrate}}",
         }
     )
 
@@ -110,43 +134,66 @@ if is_neural_compressor_available():
 
 cs.store(group="benchmark", name="inference", node=InferenceConfig)
 cs.store(group="benchmark", name="training", node=TrainingConfig)
+cs.store(group="benchmark", name="profiling", node=ProfilingConfig)
+cs.store(group="benchmark", name="compile", node=CompileConfig)
 
 
 @hydra.main(version_base=None)
 def run_experiment(experiment: DictConfig) -> None:
-    # By default, Hydra populates the metadata object_type with the ones from ExperimentConfig but the object_type should really be
-    # one of the subclass (e.g. PyTorchBackendConfig instead of BackendConfig). This is required to call `to_object`.
-    experiment = remap_to_correct_metadata(experiment)
+    # tracing starts before anything else to cover the config resolution
+    if experiment.get("trace", False):
+        TRACER.enable()
+
+    try:
+        _run_experiment(experiment)
+    finally:
+        TRACER.save("experiment_trace.json")
+        TRACER.disable()
 
-    # This is required to trigger __post_init__. Reference: https://github.com/omry/omegaconf/issues/377
-    experiment = OmegaConf.to_object(experiment)
-    experiment = OmegaConf.create(experiment)
 
-    # Save the config
-    OmegaConf.save(experiment, "hydra_config.yaml", resolve=True)
+def _run_experiment(experiment: DictConfig) -> None:
+    with TRACER.span("config.resolve"):
+        # By default, Hydra populates the metadata object_type with the ones from ExperimentConfig but the object_type should really be
+        # one of the subclass (e.g. PyTorchBackendConfig instead of BackendConfig). This is required to call `to_object`.
+        experiment = remap_to_correct_metadata(experiment)
+
+        # This is required to trigger __post_init__. Reference: https://github.com/omry/omegaconf/issues/377
+        experiment = OmegaConf.to_object(experiment)
+        experiment = OmegaConf.create(experiment)
+
+        # Save the config
+        OmegaConf.save(experiment, "hydra_config.yaml", resolve=True)
 
     # Allocate requested benchmark
-    benchmark_factory: Type[Benchmark] = get_class(experiment.benchmark._target_)
-    benchmark: Benchmark = benchmark_factory()
-    benchmark.configure(experiment.benchmark)
+    with TRACER.span("benchmark.configure"):
+        benchmark_factory: Type[Benchmark] = get_class(experiment.benchmark._target_)
+        benchmark: Benchmark = benchmark_factory()
+        benchmark.configure(experiment.benchmark)
 
     # Allocate requested backend
-    backend_factory: Type[Backend] = get_class(experiment.backend._target_)
-    backend: Backend = backend_factory(
-        experiment.model,
-        experiment.task,
-        experiment.device,
-        experiment.hub_kwargs,
-    )
+    with TRACER.span("backend.__init__"):
+        backend_factory: Type[Backend] = get_class(experiment.backend._target_)
+        backend: Backend = backend_factory(
+            experiment.model,
+            experiment.task,
+            experiment.device,
+            experiment.hub_kwargs,
+        )
 
     try:
-        backend.configure(experiment.backend)
+        with TRACER.span("backend.configure"):
+            configure_start = time.perf_counter()
+            backend.configure(experiment.backend)
+            backend.configure_latency = time.perf_counter() - configure_start
 
-        benchmark.run(backend)
+        with TRACER.span("benchmark.run"):
+            benchmark.run(backend)
         # Save the benchmark results
-        benchmark.save()
+        with TRACER.span("benchmark.save"):
+            benchmark.save()
 
-        backend.clean()
+        with TRACER.span("backend.clean"):
+            backend.clean()
     except Exception as e:
         LOGGER.error("Error during benchmarking: %s", e)
         backend.clean()
@@ -8,6 +8,7 @@ from torch.fx.graph_module import GraphModule
 from torch.fx import Interpreter
 from torch.fx.node import Node
 
+from optimum_benchmark.tracing import TRACER
 
 LOGGER = getLogger("fx_profiler")
 
@@ -15,13 +16,16 @@ LOGGER = getLogger("fx_profiler")
 class FXProfilingWrapper(Interpreter):
     def __init__(self, module: GraphModule):
         super().__init__(module)
-        self.profiling_records: List[Tuple[str, str, float]] = []
+        self.run_index: int = -1
+        self.profiling_records: List[Tuple[int, str, str, float]] = []
 
     def run(self, *args) -> Any:
+        self.run_index += 1
         return_val = super().run(*args)
         return return_val
 
     def run_node(self, node: Node) -> Any:
+        start_us = TRACER.now_us()
         if self.module.device.type == "cuda":
             start = torch.cuda.Event(enable_timing=True)
             end = torch.cuda.Event(enable_timing=True)
@@ -37,13 +41,35 @@ class FXProfilingWrapper(Interpreter):
             node_runtime = (end - start) / 1e9
 
         LOGGER.debug(f"Node {node.name} took {node_runtime:.2e} seconds")
-        self.profiling_records.append((node.name, node.op, node_runtime))
+        node_op = self.get_node_op(node)
+        self.profiling_records.append(
+            (self.run_index, node.name, node_op, node_runtime)
+        )
+        TRACER.add_event(
+            node.name,
+            start_us,
+            node_runtime * 1e6,
+            track="pytorch/fx",
+            args={"op": node_op, "run": self.run_index},
+        )
 
         return return_val
 
+    def get_node_op(self, node: Node) -> str:
+        # node.op is only the kind of node (call_module, call_function, ...)
+        # so we resolve its target to get a meaningful op type
+        if node.op == "call_module":
+            return type(self.module.get_submodule(node.target)).__name__
+        elif node.op == "call_function":
+            return getattr(node.target, "__name__", str(node.target))
+        elif node.op == "call_method":
+            return node.target
+        else:
+            return node.op
+
     def __call__(self, **kwargs) -> Any:
         args = kwargs.values()
-        return super().run(*args)
+        return self.run(*args)
 
-    def get_profiling_records(self) -> List[Tuple[str, str, float]]:
+    def get_profiling_records(self) -> List[Tuple[int, str, str, float]]:
         return self.profiling_records
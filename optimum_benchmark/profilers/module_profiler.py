@@ -0,0 +1,121 @@
+from typing import Any, Dict, List, Tuple
+from logging import getLogger
+import time
+
+import torch
+from pandas import DataFrame
+from torch.nn import Module
+
+
+LOGGER = getLogger("module_profiler")
+
+
+class ModuleProfilingWrapper:
+    """
+    Profiles an eager model with forward hooks on its submodules up to `depth`
+    (0 being the model itself), without tracing it, so it works with any
+    architecture and with generation.
+
+    Each module's inclusive time (its whole forward) and exclusive time (minus
+    the inclusive time of its profiled children) are summed per run.
+    """
+
+    def __init__(self, module: Module, depth: int = 4):
+        self.module = module
+        self.device = next(module.parameters()).device
+        self.run_index: int = -1
+        # start time and children inclusive time of the modules being executed
+        self.stack: List[List[int]] = []
+        # calls, inclusive and exclusive time per (run, module path, module class)
+        self.module_times: Dict[Tuple[int, str, str], List[int]] = {}
+
+        self.handles = []
+        for name, submodule in module.named_modules():
+            module_depth = 0 if name == "" else name.count(".") + 1
+            if module_depth > depth:
+                continue
+
+            module_path = name if name != "" else type(module).__name__
+            key = (module_path, type(submodule).__name__)
+            self.handles.append(
+                submodule.register_forward_pre_hook(self.get_pre_hook())
+            )
+            self.handles.append(submodule.register_forward_hook(self.get_hook(key)))
+
+        LOGGER.info(f"\t+ Profiling {len(self.handles) // 2} modules")
+
+    def get_pre_hook(self):
+        def pre_hook(module: Module, args: Any) -> None:
+            self.synchronize()
+            self.stack.append([time.perf_counter_ns(), 0])
+
+        return pre_hook
+
+    def get_hook(self, key: Tuple[str, str]):
+        def hook(module: Module, args: Any, output: Any) -> None:
+            self.synchronize()
+            end = time.perf_counter_ns()
+            start, children_time = self.stack.pop()
+
+            inclusive_time = end - start
+            exclusive_time = inclusive_time - children_time
+            if len(self.stack) > 0:
+                self.stack[-1][1] += inclusive_time
+
+            times = self.module_times.setdefault((self.run_index, *key), [0, 0, 0])
+            times[0] += 1
+            times[1] += inclusive_time
+            times[2] += exclusive_time
+
+        return hook
+
+    def synchronize(self) -> None:
+        # kernels are asynchronous on cuda, we need them done to time modules
+        if self.device.type == "cuda":
+            torch.cuda.synchronize(device=self.device)
+
+    def __call__(self, *args, **kwargs) -> Any:
+        self.run_index += 1
+        self.stack = []
+        return self.module(*args, **kwargs)
+
+    def generate(self, *args, **kwargs) -> Any:
+        self.run_index += 1
+        self.stack = []
+        return self.module.generate(*args, **kwargs)
+
+    def __getattr__(self, name: str) -> Any:
+        # only called for attributes the wrapper doesn't have (config, device...)
+        return getattr(self.module, name)
+
+    def remove_hooks(self) -> None:
+        for handle in self.handles:
+            handle.remove()
+        self.handles = []
+
+    def get_profiling_records(self) -> List[Tuple[int, str, str, float]]:
+        # exclusive times, so that per-op sums don't count nested modules twice
+        return [
+            (run, module_path, module_class, times[2] / 1e9)
+            for (run, module_path, module_class), times in self.module_times.items()
+        ]
+
+    def get_profiling_details(self) -> DataFrame:
+        return DataFrame(
+            [
+                (run, module_path, module_class, calls, inclusive / 1e9, exclusive / 1e9)
+                for (
+                    run,
+                    module_path,
+                    module_class,
+                ), (calls, inclusive, exclusive) in self.module_times.items()
+            ],
+            columns=[
+                "run",
+                "name",
+                "module",
+                "calls",
+                "inclusive(s)",
+                "exclusive(s)",
+            ],
+        )
@@ -1,68 +1,184 @@
-from typing import List, Tuple
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from logging import getLogger
-import pandas as pd
 import json
+import re
 
 
+from onnxruntime import InferenceSession
 from optimum.onnxruntime import ORTModel
 
+from optimum_benchmark.tracing import TRACER
 
 LOGGER = getLogger("ort_profiler")
 
+# traces of big decoders can be hundreds of MBs, so we only keep a chunk in memory
+TRACE_CHUNK_SIZE = 2**20
+
+_SEPARATORS = re.compile(r"[\s,]*")
+
 
 class ORTProfilingWrapper:
     def __init__(self, module: ORTModel):
         self.module = module
-        self.profiling_records: List[Tuple[str, str, float]] = []
+        self.sessions = get_inference_sessions(module)
+        self.profiling_files: Dict[str, str] = {}
+        self.profiling_records: Optional[List[Tuple[int, str, str, float]]] = None
+
+        LOGGER.info(f"\t+ Profiling sessions: {list(self.sessions.keys())}")
 
     def __call__(self, *args, **kwargs):
         return self.module(*args, **kwargs)
 
-    def get_profiling_records(self) -> List[Tuple[str, str, float]]:
-        profiling_json = self.module.model.end_profiling()  # type: ignore
-        with open(profiling_json) as file_obj:
-            profiling_data = json.load(file_obj)
-            if isinstance(profiling_data, dict):
-                profiling_data = profiling_data["traceEvents"]
-
-        profiling_records = extract_last_run_records(profiling_data)
-        profiling_records = normalize_records(profiling_records)
-
-        return profiling_records
-
-
-def normalize_records(data) -> List[Tuple[str, str, float]]:
+    def get_profiling_records(self) -> List[Tuple[int, str, str, float]]:
+        # profiling can only be ended once per session
+        if self.profiling_records is not None:
+            return self.profiling_records
+
+        self.profiling_records = []
+        for session_name, session in self.sessions.items():
+            profiling_json = session.end_profiling()
+            if profiling_json in self.profiling_files.values():
+                raise RuntimeError(
+                    f"Sessions {list(self.profiling_files.keys())} and {session_name} "
+                    f"wrote the same profiling trace {profiling_json}, each session "
+                    "should have its own profile_file_prefix"
+                )
+            self.profiling_files[session_name] = profiling_json
+            LOGGER.info(f"\t+ Parsing {session_name} profiling trace {profiling_json}")
+
+            # the session's events are also merged in the experiment's trace
+            events = TRACER.merge_trace_events(
+                iter_trace_events(profiling_json),
+                start_ns=session.get_profiling_start_time_ns(),
+                track=f"onnxruntime/{session_name}",
+            )
+
+            # node names are only unique within a session
+            prefix = f"{session_name}/" if len(self.sessions) > 1 else ""
+            self.profiling_records.extend(aggregate_trace_events(events, prefix))
+
+        return self.profiling_records
+
+
+def get_inference_sessions(module: ORTModel) -> Dict[str, InferenceSession]:
+    """
+    Finds the inference sessions of an ORTModel, whether it holds a single one
+    (`model`) or one per component (`encoder`, `decoder`, `decoder_with_past`,
+    `unet`, ...) each wrapping its own `session`.
+    """
+
+    sessions = {}
+    for name, value in vars(module).items():
+        if isinstance(value, InferenceSession):
+            sessions[name] = value
+        elif isinstance(getattr(value, "session", None), InferenceSession):
+            sessions[name] = value.session
+
+    return sessions
+
+
+def set_inference_session(
+    module: ORTModel, name: str, session: InferenceSession
+) -> None:
+    """
+    Replaces the inference session found by `get_inference_sessions` under `name`.
+    """
+
+    if isinstance(getattr(module, name), InferenceSession):
+        setattr(module, name, session)
+    else:
+        getattr(module, name).session = session
+
+
+def iter_trace_events(
+    profiling_json: str, chunk_size: int = TRACE_CHUNK_SIZE
+) -> Iterator[Dict[str, Any]]:
+    """
+    Incrementally decodes the events of an onnxruntime trace, which is either a
+    list of events or a dict with a "traceEvents" list, without loading it whole.
+    """
+
+    decoder = json.JSONDecoder()
+    with open(profiling_json) as file_obj:
+        buffer = ""
+        position = -1
+        # we look for the beginning of the events list
+        while position == -1:
+            chunk = file_obj.read(chunk_size)
+            if not chunk:
+                return
+            buffer += chunk
+            position = buffer.find("[")
+        position += 1
+
+        while True:
+            position = _SEPARATORS.match(buffer, position).end()
+
+            if position < len(buffer) and buffer[position] == "]":
+                return
+
+            try:
+                event, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # the event is incomplete, we read the next chunk
+                chunk = file_obj.read(chunk_size)
+                if not chunk:
+                    if position < len(buffer):
+                        LOGGER.warning(f"Trace {profiling_json} is truncated")
+                    return
+                buffer = buffer[position:] + chunk
+                position = 0
+                continue
+
+            yield event
+
+
+def aggregate_trace_events(
+    events: Iterator[Dict[str, Any]], prefix: str = ""
+) -> List[Tuple[int, str, str, float]]:
+    """
+    Sums the runtime of each node over each run of the session, returning one
+    (run, name, op, runtime) record per node and run.
+    """
+
+    # Here we assume that the traces are properly ordered: a run's node events
+    # are followed by its "model_run" session event, which closes the run.
+    run_index = 0
+    run_runtimes: Dict[Tuple[str, str], float] = {}
     records = []
-    for item in data:
-        cat = item.get("cat")
+
+    for event in events:
+        cat = event.get("cat")
         if cat is None:
             continue
-        dur = item.get("dur")
+        name = event["name"]
+
+        if cat == "Session" and name == "model_run":
+            records.extend(
+                (run_index, node_name, op_name, runtime)
+                for (node_name, op_name), runtime in run_runtimes.items()
+            )
+            run_runtimes = {}
+            run_index += 1
+            continue
+
+        dur = event.get("dur")
         if dur is None:
             continue
-        arg = item.get("args")
+        arg = event.get("args")
         if arg is None:
             continue
         op_name = arg.get("op_name")
 
-        name = item["name"]
-
         if cat != "Kernel" and not name.endswith("kernel_time"):
             continue
 
         if cat in ["Kernel", "Node"]:
             LOGGER.debug(f"Kernel/Node {name} took {dur / 1e6:.2e} seconds")
-            records.append((name.replace("_kernel_time", ""), op_name, dur / 1e6))
-
-    return records
+            key = (prefix + name.replace("_kernel_time", ""), op_name)
+            run_runtimes[key] = run_runtimes.get(key, 0.0) + dur / 1e6
 
+    if len(run_runtimes) > 0:
+        LOGGER.warning("Dropping node events of an unfinished run")
 
-def extract_last_run_records(data):
-    # Here we assume that the traces are properly ordered, so we can simplify the splitting logic.
-    return (
-        pd.DataFrame(data)[["name", "cat", "dur", "args"]]
-        .groupby("name")
-        .last()  # not sure if this is the right way to do it
-        .reset_index()
-        .to_dict(orient="records")
-    )
+    return records
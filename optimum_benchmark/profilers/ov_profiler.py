@@ -0,0 +1,120 @@
+from typing import Any, Dict, List, Tuple
+from logging import getLogger
+
+from pandas import DataFrame
+from openvino.runtime import ProfilingInfo
+from optimum.intel.openvino.modeling_base import OVBaseModel
+
+
+LOGGER = getLogger("ov_profiler")
+
+
+class OVProfilingWrapper:
+    def __init__(self, module: OVBaseModel):
+        self.module = module
+        self.components = get_model_components(module)
+        self.run_index: int = -1
+        self.profiling_records: List[Tuple[int, str, str, float]] = []
+        self.layers_records: List[Tuple[int, str, str, str, str, float, float]] = []
+
+        LOGGER.info(f"\t+ Profiling components: {list(self.components.keys())}")
+
+        # performance counters are only enabled at compilation
+        LOGGER.info("\t+ Compiling model with performance counters")
+        self.module.ov_config["PERF_COUNT"] = "YES"
+        for component in self.components.values():
+            component.request = None
+        self.module.compile()
+
+    def __call__(self, *args, **kwargs):
+        self.run_index += 1
+        output = self.module(*args, **kwargs)
+
+        # the infer requests only hold the counters of their last inference
+        for component_name, component in self.components.items():
+            infer_request = get_infer_request(component.request)
+            if infer_request is None:
+                continue
+
+            # layer names are only unique within a component
+            prefix = f"{component_name}/" if len(self.components) > 1 else ""
+            for layer in infer_request.get_profiling_info():
+                self.record_layer(prefix, layer)
+
+        return output
+
+    def record_layer(self, prefix: str, layer: ProfilingInfo) -> None:
+        status = layer.status.name
+        real_time = layer.real_time.total_seconds()
+        cpu_time = layer.cpu_time.total_seconds()
+        name = prefix + layer.node_name
+
+        self.layers_records.append(
+            (
+                self.run_index,
+                name,
+                layer.node_type,
+                layer.exec_type,
+                status,
+                real_time,
+                cpu_time,
+            )
+        )
+
+        # layers that were fused or optimized out have no runtime of their own
+        if layer.status == ProfilingInfo.Status.EXECUTED:
+            LOGGER.debug(f"Layer {name} took {real_time:.2e} seconds")
+            # the primitive (e.g. jit_avx512 vs ref) is part of the op type
+            # so that reference kernels fallbacks stand out in the aggregation
+            self.profiling_records.append(
+                (
+                    self.run_index,
+                    name,
+                    f"{layer.node_type} ({layer.exec_type})",
+                    real_time,
+                )
+            )
+
+    def get_profiling_records(self) -> List[Tuple[int, str, str, float]]:
+        return self.profiling_records
+
+    def get_profiling_details(self) -> DataFrame:
+        return DataFrame(
+            self.layers_records,
+            columns=[
+                "run",
+                "name",
+                "layer_type",
+                "primitive",
+                "status",
+                "real_time(s)",
+                "cpu_time(s)",
+            ],
+        )
+
+
+def get_model_components(module: OVBaseModel) -> Dict[str, Any]:
+    """
+    Finds the components of an OVModel holding an infer request: the model
+    itself or its `encoder`, `decoder`, `decoder_with_past`, ... components.
+    """
+
+    components = {
+        name: value
+        for name, value in vars(module).items()
+        if name != "parent_model" and hasattr(value, "request")
+    }
+
+    if len(components) == 0:
+        components = {"model": module}
+
+    return components
+
+
+def get_infer_request(request: Any) -> Any:
+    # optimum-intel either keeps an InferRequest or calls the CompiledModel
+    # directly, in which case openvino uses an internal infer request
+    if request is None or hasattr(request, "get_profiling_info"):
+        return request
+
+    return getattr(request, "_infer_request", None)
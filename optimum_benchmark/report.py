@@ -99,11 +99,44 @@ def get_inference_rich_table(
     if with_baseline:
         perf_columns.append("forward.speedup(%)")
 
+    perf_columns += [
+        col
+        for col in [
+            "forward.cold_startup_latency(s)",
+            "forward.warm_startup_latency(s)",
+        ]
+        if col in inference_report.columns
+    ]
+
+    perf_columns += [
+        col
+        for col in [
+            "forward.async_latency(s)",
+            "forward.async_throughput(samples/s)",
+            "forward.cpu_utilization(%)",
+            "forward.achieved(GFLOP/s)",
+            "forward.efficiency(%)",
+        ]
+        if col in inference_report.columns
+    ]
+
     if with_generate:
         perf_columns += ["generate.latency(s)", "generate.throughput(tokens/s)"]
         if with_baseline:
             perf_columns.append("generate.speedup(%)")
 
+        perf_columns += [
+            col
+            for col in [
+                "generate.prefill_latency(s)",
+                "generate.per_token_latency(s)",
+                "generate.cpu_utilization(%)",
+                "generate.achieved(GFLOP/s)",
+                "generate.efficiency(%)",
+            ]
+            if col in inference_report.columns
+        ]
+
     additional_columns = [
         col
         for col in inference_report.columns
@@ -0,0 +1,130 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from contextlib import contextmanager
+from logging import getLogger
+import json
+import time
+import os
+
+
+LOGGER = getLogger("tracing")
+
+EXPERIMENT_TRACK = "experiment"
+
+
+class Tracer:
+    """
+    Records the experiment's phases as spans in the Chrome trace event format,
+    which can be opened in https://ui.perfetto.dev or chrome://tracing.
+
+    Events from the profilers (onnxruntime traces, FX nodes) are merged in their
+    own tracks of the same timeline, which is why timestamps are taken with the
+    monotonic clock but shifted to the unix epoch, like onnxruntime's.
+    """
+
+    def __init__(self):
+        self.enabled: bool = False
+        self.pid = os.getpid()
+        self.events: List[Dict[str, Any]] = []
+        self.tracks: Dict[str, int] = {}
+        self.epoch_offset_ns = time.time_ns() - time.perf_counter_ns()
+
+    def enable(self) -> None:
+        # sweeps run in the same process, each run gets its own trace
+        LOGGER.info("Tracing experiment")
+        self.events = []
+        self.tracks = {}
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def now_us(self) -> float:
+        return (time.perf_counter_ns() + self.epoch_offset_ns) / 1e3
+
+    def get_track_id(self, track: str) -> int:
+        if track not in self.tracks:
+            self.tracks[track] = len(self.tracks)
+
+        return self.tracks[track]
+
+    @contextmanager
+    def span(self, name: str, track: str = EXPERIMENT_TRACK, **args):
+        # can be used as a context manager or as a method decorator
+        if not self.enabled:
+            yield
+            return
+
+        start = self.now_us()
+        try:
+            yield
+        finally:
+            self.add_event(name, start, self.now_us() - start, track, args)
+
+    def add_event(
+        self,
+        name: str,
+        start_us: float,
+        duration_us: float,
+        track: str = EXPERIMENT_TRACK,
+        args: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        if not self.enabled:
+            return
+
+        self.events.append(
+            {
+                "name": name,
+                "cat": track,
+                "ph": "X",
+                "ts": start_us,
+                "dur": duration_us,
+                "pid": self.pid,
+                "tid": self.get_track_id(track),
+                "args": args or {},
+            }
+        )
+
+    def merge_trace_events(
+        self, events: Iterable[Dict[str, Any]], start_ns: int, track: str
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Passes through the events of a profiler's trace, whose timestamps are
+        relative to `start_ns` (since epoch), recording its complete events.
+        """
+
+        for event in events:
+            if self.enabled and event.get("ph") == "X":
+                self.events.append(
+                    {
+                        **event,
+                        "ts": event["ts"] + start_ns / 1e3,
+                        "pid": self.pid,
+                        "tid": self.get_track_id(track),
+                    }
+                )
+            yield event
+
+    def save(self, path: str = "experiment_trace.json") -> None:
+        if not self.enabled:
+            return
+
+        LOGGER.info(f"Saving experiment trace to {path}")
+        metadata = [
+            {
+                "name": "thread_name",
+                "ph": "M",
+                "pid": self.pid,
+                "tid": track_id,
+                "args": {"name": track},
+            }
+            for track, track_id in self.tracks.items()
+        ]
+        with open(path, "w") as file_obj:
+            json.dump(
+                {"traceEvents": metadata + self.events, "displayTimeUnit": "ms"},
+                file_obj,
+            )
+
+
+# a single tracer per process, so that any module can add its spans
+TRACER = Tracer()
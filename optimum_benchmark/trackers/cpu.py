@@ -0,0 +1,42 @@
+from contextlib import contextmanager
+from logging import getLogger
+import time
+
+import psutil
+
+
+LOGGER = getLogger("cpu_tracker")
+
+
+class CPUUtilizationTracker:
+    """
+    Tracks the CPU time consumed by this process (all its threads, user and
+    system) relative to the wall time, like top: 100% is one busy core. Busy
+    waiting threads (e.g. spinning thread pools) count as utilized.
+    """
+
+    def __init__(self):
+        self.process = psutil.Process()
+        self.cpu_time: float = 0.0
+        self.wall_time: float = 0.0
+
+    @contextmanager
+    def track(self):
+        start_cpu_times = self.process.cpu_times()
+        start = time.perf_counter_ns()
+        yield
+        end = time.perf_counter_ns()
+        end_cpu_times = self.process.cpu_times()
+
+        self.wall_time += (end - start) / 1e9
+        self.cpu_time += (end_cpu_times.user - start_cpu_times.user) + (
+            end_cpu_times.system - start_cpu_times.system
+        )
+
+        LOGGER.debug(f"Tracked CPU time: {self.cpu_time:.2e}s")
+
+    def get_cpu_utilization(self) -> float:
+        if self.wall_time == 0:
+            return 0.0
+
+        return self.cpu_time / self.wall_time * 100
@@ -0,0 +1,102 @@
+from typing import Any, Dict
+from logging import getLogger
+
+import torch
+from torch.utils.flop_counter import FlopCounterMode
+
+
+LOGGER = getLogger("flops_counter")
+
+MASK_INPUTS = ["attention_mask", "decoder_attention_mask"]
+
+
+class FLOPsCounter:
+    """
+    Counts the FLOPs of the benchmarked workload on a reference PyTorch model.
+
+    The reference model is instantiated from the backend's config on the meta
+    device, so counting is free of compute and independent of the backend's own
+    graph rewrites (fusions, quantization, compilation): what's counted are the
+    model's FLOPs, which is what efficiency (MFU) is defined against.
+    """
+
+    def __init__(self, backend):
+        from accelerate import init_empty_weights
+
+        if backend.pretrained_config is None:
+            raise NotImplementedError("FLOPs counting is not supported for pipelines")
+
+        LOGGER.info("\t+ Instantiating reference model on device: meta")
+        with init_empty_weights(include_buffers=True):
+            self.model = backend.automodel_class.from_config(
+                config=backend.pretrained_config,
+                trust_remote_code=backend.hub_kwargs.get("trust_remote_code", False),
+            )
+        self.is_encoder_decoder = backend.pretrained_config.is_encoder_decoder
+
+    def count_forward_flops(self, input: Dict[str, Any]) -> int:
+        self.model.eval()
+        input = to_meta(input)
+
+        with torch.no_grad(), FlopCounterMode(display=False) as flop_counter:
+            _ = self.model(**input)
+
+        return flop_counter.get_total_flops()
+
+    def count_generate_flops(self, input: Dict[str, Any], new_tokens: int) -> int:
+        """
+        Counts the FLOPs of a greedy generation of `new_tokens` tokens using the
+        KV cache: a prefill forward pass followed by `new_tokens - 1` decoding
+        steps, each attending to the past keys and values.
+        """
+
+        self.model.eval()
+        input = to_meta(input)
+        batch_size = next(iter(input.values())).shape[0]
+        next_token = torch.zeros((batch_size, 1), dtype=torch.long, device="meta")
+
+        if self.is_encoder_decoder:
+            # generation starts with a single decoder token
+            input["decoder_input_ids"] = next_token
+
+        with torch.no_grad(), FlopCounterMode(display=False) as flop_counter:
+            output = self.model(**input, use_cache=True)
+
+            for _ in range(new_tokens - 1):
+                if self.is_encoder_decoder:
+                    step_input = {
+                        "decoder_input_ids": next_token,
+                        "encoder_outputs": (output.encoder_last_hidden_state,),
+                    }
+                else:
+                    step_input = {"input_ids": next_token}
+
+                output = self.model(
+                    **step_input,
+                    past_key_values=output.past_key_values,
+                    use_cache=True,
+                )
+
+        return flop_counter.get_total_flops()
+
+    def count_training_flops(self, input: Dict[str, Any]) -> int:
+        self.model.train()
+        input = to_meta(input)
+
+        with torch.enable_grad(), FlopCounterMode(display=False) as flop_counter:
+            output = self.model(**input)
+            output.loss.backward()
+
+        self.model.zero_grad(set_to_none=True)
+
+        return flop_counter.get_total_flops()
+
+
+def to_meta(input: Dict[str, Any]) -> Dict[str, Any]:
+    # masks don't change the counted FLOPs (matmuls, convolutions, attention)
+    # but models inspect their values, which is impossible on the meta device
+    return {
+        key: value.to("meta") if isinstance(value, torch.Tensor) else value
+        for key, value in input.items()
+        if key not in MASK_INPUTS
+    }
@@ -0,0 +1,67 @@
+from contextlib import contextmanager
+from logging import getLogger
+from typing import Any, Dict
+import resource
+import time
+
+import psutil
+
+
+LOGGER = getLogger("load_tracker")
+
+
+class LoadTracker:
+    """
+    Tracks the time, disk reads, page faults and resident memory increase of
+    loading a model. Disk reads are what's actually read from the storage
+    (nothing when the checkpoint is in the page cache), while the throughput
+    is relative to the loaded bytes.
+    """
+
+    def __init__(self):
+        self.process = psutil.Process()
+        self.load_time: float = 0.0
+        self.read_bytes: int = 0
+        self.major_page_faults: int = 0
+        self.minor_page_faults: int = 0
+        self.memory_increase: int = 0
+
+    @contextmanager
+    def track(self):
+        start_read_bytes = self.get_read_bytes()
+        start_usage = resource.getrusage(resource.RUSAGE_SELF)
+        start_rss = self.process.memory_info().rss
+        start = time.perf_counter_ns()
+        yield
+        end = time.perf_counter_ns()
+        end_usage = resource.getrusage(resource.RUSAGE_SELF)
+        self.memory_increase = self.process.memory_info().rss - start_rss
+
+        self.load_time = (end - start) / 1e9
+        self.read_bytes = self.get_read_bytes() - start_read_bytes
+        self.major_page_faults = end_usage.ru_majflt - start_usage.ru_majflt
+        self.minor_page_faults = end_usage.ru_minflt - start_usage.ru_minflt
+
+        LOGGER.debug(f"Tracked load time: {self.load_time:.2e}s")
+
+    def get_read_bytes(self) -> int:
+        try:
+            return self.process.io_counters().read_bytes
+        except (AttributeError, psutil.AccessDenied):
+            # not available on macos
+            return 0
+
+    def get_metrics(self, loaded_bytes: int) -> Dict[str, Any]:
+        return {
+            "load_time(s)": significant_figures(self.load_time),
+            "load_read(MB)": significant_figures(self.read_bytes / 1e6),
+            "load_throughput(GB/s)": significant_figures(
+                loaded_bytes / 1e9 / self.load_time
+            ),
+            "load_major_page_faults": self.major_page_faults,
+            "load_minor_page_faults": self.minor_page_faults,
+        }
+
+
+def significant_figures(x):
+    return float(f"{x:.3g}")
@@ -60,6 +60,37 @@ def get_cpu_ram_mb():
     return bytes_to_mega_bytes(psutil.virtual_memory().total)
 
 
+# the instruction sets that matter for inference on cpu
+CPU_ISA_FEATURES = [
+    "avx2",
+    "fma",
+    "avx512f",
+    "avx512_vnni",
+    "avx512_bf16",
+    "avx512_fp16",
+    "avx_vnni",
+    "amx_tile",
+    "amx_int8",
+    "amx_bf16",
+    "amx_fp16",
+]
+
+
+def get_cpu_isa_features() -> Optional[List[str]]:
+    # only known on linux, where the kernel lists them in /proc/cpuinfo,
+    # None means unknown (and not that the features are missing)
+    if platform.system() != "Linux":
+        return None
+
+    with open("/proc/cpuinfo") as file_obj:
+        for line in file_obj:
+            if line.startswith("flags"):
+                flags = set(line.split(":", 1)[1].split())
+                return [feature for feature in CPU_ISA_FEATURES if feature in flags]
+
+    return None
+
+
 def check_no_process_is_running_on_cuda_device(device_ids: List[int]) -> None:
     """
     Raises a RuntimeError if any process is running on the given cuda device.
@@ -184,6 +215,8 @@ _NAME_TO_IMPORTPATH = {
     "onnxruntime": "optimum_benchmark.backends.onnxruntime",
     "inference": "optimum_benchmark.benchmarks.inference",
     "training": "optimum_benchmark.benchmarks.training",
+    "profiling": "optimum_benchmark.benchmarks.profiling",
+    "compile": "optimum_benchmark.benchmarks.compile",
 }
 
 _NAME_TO_CLASS_NAME = {
@@ -193,6 +226,8 @@ _NAME_TO_CLASS_NAME = {
     "onnxruntime": "ORTConfig",
     "inference": "InferenceConfig",
     "training": "TrainingConfig",
+    "profiling": "ProfilingConfig",
+    "compile": "CompileConfig",
 }
 
 